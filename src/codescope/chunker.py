@@ -7,15 +7,28 @@ unsupported languages or when tree-sitter parsing fails.
 
 from __future__ import annotations
 
+import hashlib
 import logging
-from dataclasses import dataclass
+import multiprocessing
+import os
+import re
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
+from .config import root_prefix_len
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Chunk:
     """A single chunk of source code."""
 
@@ -25,11 +38,15 @@ class Chunk:
     content: str
     language: str | None = None
     symbol: str | None = None  # function/class name if detected
+    id: str = field(init=False)  # stable identifier, built once from the fields above
+
+    def __post_init__(self) -> None:
+        self.id = f"{self.file_path}:{self.start_line}-{self.end_line}"
 
     @property
-    def id(self) -> str:
-        """Stable identifier for this chunk."""
-        return f"{self.file_path}:{self.start_line}-{self.end_line}"
+    def content_hash(self) -> bytes:
+        """Digest of the chunk text, used to embed identical chunks only once."""
+        return hashlib.blake2b(self.content.encode("utf-8"), digest_size=16).digest()
 
 
 # --- Tree-sitter language registry ---
@@ -37,10 +54,15 @@ class Chunk:
 # Maps file extensions to (module_name, language_name) for lazy import
 EXTENSION_TO_LANGUAGE: dict[str, tuple[str, str]] = {
     ".py": ("tree_sitter_python", "python"),
+    ".pyi": ("tree_sitter_python", "python"),
     ".js": ("tree_sitter_javascript", "javascript"),
     ".jsx": ("tree_sitter_javascript", "javascript"),
+    ".mjs": ("tree_sitter_javascript", "javascript"),
+    ".cjs": ("tree_sitter_javascript", "javascript"),
     ".ts": ("tree_sitter_typescript", "typescript"),
-    ".tsx": ("tree_sitter_typescript", "typescript"),
+    ".mts": ("tree_sitter_typescript", "typescript"),
+    ".cts": ("tree_sitter_typescript", "typescript"),
+    ".tsx": ("tree_sitter_typescript", "tsx"),
     ".go": ("tree_sitter_go", "go"),
     ".rs": ("tree_sitter_rust", "rust"),
     ".java": ("tree_sitter_java", "java"),
@@ -55,255 +77,587 @@ EXTENSION_TO_LANGUAGE: dict[str, tuple[str, str]] = {
     ".css": ("tree_sitter_css", "css"),
 }
 
+
+# Well-known extensionless files, matched by exact name
+FILENAME_TO_LANGUAGE: dict[str, tuple[str, str]] = {
+    "SConstruct": ("tree_sitter_python", "python"),
+    "SConscript": ("tree_sitter_python", "python"),
+    "Rakefile": ("tree_sitter_ruby", "ruby"),
+    "Gemfile": ("tree_sitter_ruby", "ruby"),
+    "Guardfile": ("tree_sitter_ruby", "ruby"),
+    "Vagrantfile": ("tree_sitter_ruby", "ruby"),
+}
+
+# Interpreter named on a script's first line, e.g. "#!/usr/bin/env python3".
+# One anchored pattern, so a non-matching file costs a single failed match.
+_SHEBANG_RE = re.compile(rb"#![^\n]*?\b(python|node|ruby)")
+_SHEBANG_TO_LANGUAGE: dict[bytes, tuple[str, str]] = {
+    b"python": ("tree_sitter_python", "python"),
+    b"node": ("tree_sitter_javascript", "javascript"),
+    b"ruby": ("tree_sitter_ruby", "ruby"),
+}
+
+# Bytes read from an extensionless file to look for a shebang
+_SNIFF_BYTES = 128
+
+
+def _language_for(path: Path, head: bytes = b"") -> tuple[str, str] | None:
+    """Return the (module_name, language_name) entry for a file, if any.
+
+    Files are recognised by extension, then by well-known name, then by a
+    shebang in *head* (the start of the file's contents), if given.
+    """
+    name = path.name
+    dot = name.rfind(".")
+    if dot > 0:  # has a suffix and is not a dotfile like ".bashrc"
+        lang_info = EXTENSION_TO_LANGUAGE.get(name[dot:].lower())
+        if lang_info is not None:
+            return lang_info
+    lang_info = FILENAME_TO_LANGUAGE.get(name)
+    if lang_info is None and head:
+        match = _SHEBANG_RE.match(head)
+        if match is not None:
+            lang_info = _SHEBANG_TO_LANGUAGE[match.group(1)]
+    return lang_info
+
+
+def sniff_language(path: Path) -> tuple[str, str] | None:
+    """Recognise an extensionless file by name or shebang line.
+
+    Returns None for unrecognised or unreadable files.
+    """
+    lang_info = FILENAME_TO_LANGUAGE.get(path.name)
+    if lang_info is not None:
+        return lang_info
+    try:
+        with path.open("rb") as f:
+            head = f.read(_SNIFF_BYTES)
+    except OSError:
+        return None
+    return _language_for(path, head)
+
+
 # Top-level node types we want to extract as individual chunks per language
-SEMANTIC_NODE_TYPES: dict[str, set[str]] = {
-    "python": {
+SEMANTIC_NODE_TYPES: dict[str, frozenset[str]] = {
+    "python": frozenset({
         "function_definition", "class_definition", "decorated_definition",
-    },
-    "javascript": {
+    }),
+    "javascript": frozenset({
         "function_declaration", "class_declaration", "export_statement",
         "lexical_declaration", "expression_statement",
-    },
-    "typescript": {
+    }),
+    "typescript": frozenset({
         "function_declaration", "class_declaration", "export_statement",
         "lexical_declaration", "interface_declaration", "type_alias_declaration",
         "enum_declaration",
-    },
-    "go": {
+    }),
+    "go": frozenset({
         "function_declaration", "method_declaration", "type_declaration",
-    },
-    "rust": {
+    }),
+    "rust": frozenset({
         "function_item", "impl_item", "struct_item", "enum_item",
         "trait_item", "mod_item",
-    },
-    "java": {
+    }),
+    "java": frozenset({
         "class_declaration", "interface_declaration", "enum_declaration",
         "method_declaration",
-    },
-    "c": {
+    }),
+    "c": frozenset({
         "function_definition", "struct_specifier", "enum_specifier",
         "declaration",
-    },
-    "cpp": {
+    }),
+    "cpp": frozenset({
         "function_definition", "class_specifier", "struct_specifier",
         "namespace_definition", "template_declaration",
-    },
-    "c_sharp": {
+    }),
+    "c_sharp": frozenset({
         "class_declaration", "interface_declaration", "method_declaration",
         "namespace_declaration", "enum_declaration",
-    },
-    "ruby": {
+    }),
+    "ruby": frozenset({
         "method", "class", "module", "singleton_method",
-    },
+    }),
 }
+SEMANTIC_NODE_TYPES["tsx"] = SEMANTIC_NODE_TYPES["typescript"]
 
-# Cache for loaded parsers
-_parser_cache: dict[str, Any] = {}
+# Files longer than this skip tree-sitter and go straight to the sliding
+# window; they are almost always generated and parse slowly
+MAX_PARSE_LINES = 20_000
 
+# Files whose average line is longer than this are minified bundles or data
+# blobs: slow to parse and useless as search results, so they are skipped
+MAX_AVG_LINE_LENGTH = 500
 
-def _get_parser(language_name: str, module_name: str) -> Any | None:
-    """Lazily load and cache a tree-sitter parser for the given language."""
-    if language_name in _parser_cache:
-        return _parser_cache[language_name]
+# A NUL byte within this many leading bytes marks a file as binary
+_BINARY_SNIFF_BYTES = 8192
+
+# chunk_files hands batches of at least this many files to a process pool;
+# below it, worker start-up costs more than it saves
+PROCESS_POOL_MIN_FILES = 256
+
+# Cache for loaded languages. Language objects are immutable and safe to
+# share across threads; Parser objects are not, so each thread keeps its own.
+# None marks a language whose grammar failed to load, so the import is not
+# retried for every file of that language.
+_language_cache: dict[str, Any | None] = {}
+_thread_local = threading.local()
+# Compiled queries matching each language's semantic node types. Queries are
+# immutable once built; None marks a language whose query failed to compile.
+_query_cache: dict[str, Any | None] = {}
+
+
+def _get_language(language_name: str, module_name: str) -> Any | None:
+    """Lazily load and cache a tree-sitter Language for the given language."""
+    if language_name in _language_cache:
+        return _language_cache[language_name]
 
     try:
         import importlib
 
-        from tree_sitter import Language, Parser
+        from tree_sitter import Language
 
         mod = importlib.import_module(module_name)
-        lang_fn = getattr(mod, "language", None)
+        # Packages with several grammars (typescript/tsx) name each one
+        lang_fn = getattr(mod, f"language_{language_name}", None) or getattr(
+            mod, "language", None
+        )
 
-        if lang_fn is None:
-            return None
+        language = Language(lang_fn()) if lang_fn is not None else None
+    except Exception:
+        logger.debug("Failed to load tree-sitter language for %s", language_name, exc_info=True)
+        language = None
 
-        # Handle typescript which has language_typescript and language_tsx
-        if language_name == "typescript":
-            lang_fn = getattr(mod, "language_typescript", lang_fn)
+    _language_cache[language_name] = language
+    return language
 
-        language = Language(lang_fn())
-        parser = Parser(language)
-        _parser_cache[language_name] = parser
-        return parser
-    except Exception:
-        logger.debug("Failed to load tree-sitter parser for %s", language_name, exc_info=True)
+
+def _get_parser(language_name: str, module_name: str) -> Any | None:
+    """Return this thread's tree-sitter parser for the given language."""
+    parsers: dict[str, Any | None] | None = getattr(_thread_local, "parsers", None)
+    if parsers is None:
+        parsers = _thread_local.parsers = {}
+    if language_name in parsers:
+        return parsers[language_name]
+
+    language = _get_language(language_name, module_name)
+    if language is None:
+        parsers[language_name] = None
         return None
 
+    from tree_sitter import Parser
+
+    parser = Parser(language)
+    parsers[language_name] = parser
+    return parser
+
+
+def _get_query(
+    language_name: str, module_name: str, semantic_types: frozenset[str]
+) -> Any | None:
+    """Lazily compile and cache a query capturing the language's semantic nodes."""
+    if language_name in _query_cache:
+        return _query_cache[language_name]
+
+    language = _get_language(language_name, module_name)
+    if language is None:
+        return None
+
+    from tree_sitter import Query
+
+    source = "[" + " ".join(f"({t})" for t in sorted(semantic_types)) + "] @semantic"
+    try:
+        query: Any | None = Query(language, source)
+    except Exception:
+        logger.debug("Failed to compile tree-sitter query for %s", language_name, exc_info=True)
+        query = None
+    _query_cache[language_name] = query
+    return query
+
+
+def _semantic_children(
+    root: Any, language_name: str, module_name: str, semantic_types: frozenset[str]
+) -> list[Any]:
+    """Return the root's direct children of a semantic type, in document order."""
+    query = _get_query(language_name, module_name, semantic_types)
+    if query is None:
+        return [child for child in root.children if child.type in semantic_types]
+
+    from tree_sitter import QueryCursor
+
+    # Depth 1 restricts matches to the root's direct children, so the query
+    # never descends into function or class bodies.
+    cursor = QueryCursor(query)
+    cursor.set_max_start_depth(1)
+    nodes = cursor.captures(root).get("semantic", [])
+    # Captures are grouped by alternative, not by position
+    nodes.sort(key=lambda node: node.start_byte)
+    return nodes
+
 
 def _get_node_name(node: Any) -> str | None:
     """Extract the symbol name from a tree-sitter node."""
     # For decorated definitions, dig into the inner definition
     if node.type == "decorated_definition":
+        definition = node.child_by_field_name("definition")
+        return _get_node_name(definition) if definition is not None else None
+
+    # JS/TS exports wrap the exported declaration; ``export default foo;``
+    # has none, so name it after the exported identifier
+    if node.type == "export_statement":
+        declaration = node.child_by_field_name("declaration")
+        if declaration is not None:
+            return _get_node_name(declaration)
         for child in node.children:
-            if child.type in (
-                "function_definition", "class_definition",
-                "method_declaration", "class_declaration",
-            ):
-                return _get_node_name(child)
+            if child.type == "identifier":
+                return child.text.decode("utf-8", errors="replace")
         return None
 
-    # Look for a name/identifier child node
-    for child in node.children:
-        if child.type in ("identifier", "name", "property_identifier", "type_identifier"):
-            return child.text.decode("utf-8", errors="replace") if child.text else None
-    return None
-
-
-def _node_to_chunk(
-    node: Any,
-    lines: list[str],
-    language: str,
-) -> Chunk:
-    """Convert a tree-sitter node to a Chunk."""
-    start_line = node.start_point[0]  # 0-indexed
-    end_line = node.end_point[0]  # 0-indexed
-
-    content = "".join(lines[start_line : end_line + 1])
-    symbol = _get_node_name(node)
-
-    return Chunk(
-        file_path="",  # caller sets this
-        start_line=start_line + 1,  # 1-indexed
-        end_line=end_line + 1,
-        content=content,
-        language=language,
-        symbol=symbol,
-    )
+    # Grammars expose the declared name as a "name" field; Rust impl blocks
+    # have no name of their own, so use the implemented type instead.
+    name = node.child_by_field_name("name")
+    if name is None and node.type == "impl_item":
+        name = node.child_by_field_name("type")
+    return name.text.decode("utf-8", errors="replace") if name is not None else None
+
+
+def _line_starts(data: bytes) -> list[int]:
+    """Return the byte offset at which each line starts, plus a trailing end offset.
+
+    Line ``i`` (0-indexed) spans ``data[starts[i]:starts[i + 1]]``, so the
+    number of lines is ``len(starts) - 1``.
+    """
+    newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 0x0A)
+    starts: list[int] = np.concatenate(([0], newlines + 1)).tolist()
+    if starts[-1] != len(data):
+        starts.append(len(data))
+    return starts
+
+
+def _slice_lines(data: bytes, line_starts: list[int], start: int, stop: int) -> str:
+    """Decode lines ``[start, stop)`` (0-indexed) from one contiguous slice."""
+    stop = min(stop, len(line_starts) - 1)
+    return data[line_starts[start] : line_starts[stop]].decode("utf-8", errors="replace")
 
 
 def _chunk_with_treesitter(
-    text: str,
-    lines: list[str],
+    data: bytes,
+    line_starts: list[int],
     language_name: str,
     module_name: str,
+    semantic_types: frozenset[str],
     max_lines: int,
     overlap: int,
-) -> list[Chunk] | None:
-    """Try to chunk a file using tree-sitter. Returns None if parsing fails."""
+    *,
+    file_path: str = "",
+) -> Iterator[Chunk]:
+    """Chunk a file using tree-sitter. Yields nothing if parsing fails."""
     parser = _get_parser(language_name, module_name)
     if parser is None:
-        return None
+        return
 
     try:
-        tree = parser.parse(text.encode("utf-8"))
+        tree = parser.parse(data)
     except Exception:
-        return None
+        return
 
     root = tree.root_node
-    semantic_types = SEMANTIC_NODE_TYPES.get(language_name, set())
-
-    if not semantic_types:
-        return None
-
-    chunks: list[Chunk] = []
+    num_lines = len(line_starts) - 1
     last_end = 0
 
-    for child in root.children:
+    for child in _semantic_children(root, language_name, module_name, semantic_types):
+        # Read each node attribute once; every access crosses into the binding
         child_start = child.start_point[0]
         child_end = child.end_point[0]
         node_lines = child_end - child_start + 1
-
-        if child.type in semantic_types:
-            # Capture any "gap" lines before this node (imports, comments, etc.)
-            if child_start > last_end and last_end < len(lines):
-                gap_content = "".join(lines[last_end:child_start])
-                if gap_content.strip():
-                    chunks.append(Chunk(
-                        file_path="",
-                        start_line=last_end + 1,
-                        end_line=child_start,
-                        content=gap_content,
-                        language=language_name,
-                        symbol=None,
-                    ))
-
-            if node_lines <= max_lines:
-                # Node fits in one chunk
-                chunks.append(_node_to_chunk(child, lines, language_name))
-            else:
-                # Node too large — split it with sliding window
-                chunks.extend(
-                    _sliding_window(
-                        lines[child_start : child_end + 1],
-                        offset=child_start,
-                        max_lines=max_lines,
-                        overlap=overlap,
-                        language=language_name,
-                        symbol=_get_node_name(child),
-                    )
+        symbol = _get_node_name(child)
+
+        # Capture any "gap" lines before this node (imports, comments, etc.)
+        if child_start > last_end and last_end < num_lines:
+            gap_content = _slice_lines(data, line_starts, last_end, child_start)
+            if gap_content.strip():
+                yield Chunk(
+                    file_path=file_path,
+                    start_line=last_end + 1,
+                    end_line=child_start,
+                    content=gap_content,
+                    language=language_name,
+                    symbol=None,
                 )
-            last_end = child_end + 1
+
+        if node_lines <= max_lines:
+            # Node fits in one chunk
+            yield Chunk(
+                file_path=file_path,
+                start_line=child_start + 1,  # 1-indexed
+                end_line=child_end + 1,
+                content=_slice_lines(data, line_starts, child_start, child_end + 1),
+                language=language_name,
+                symbol=symbol,
+            )
+        else:
+            # Node too large — split it with sliding window
+            yield from _sliding_window(
+                data,
+                line_starts,
+                start=child_start,
+                stop=child_end + 1,
+                max_lines=max_lines,
+                overlap=overlap,
+                file_path=file_path,
+                language=language_name,
+                symbol=symbol,
+            )
+        last_end = child_end + 1
 
     # Capture trailing content after last semantic node
-    if last_end < len(lines):
-        trailing = "".join(lines[last_end:])
+    if last_end < num_lines:
+        trailing = _slice_lines(data, line_starts, last_end, num_lines)
         if trailing.strip():
-            chunks.append(Chunk(
-                file_path="",
+            yield Chunk(
+                file_path=file_path,
                 start_line=last_end + 1,
-                end_line=len(lines),
+                end_line=num_lines,
                 content=trailing,
                 language=language_name,
                 symbol=None,
-            ))
-
-    return chunks if chunks else None
+            )
 
 
 def _sliding_window(
-    lines: list[str],
+    data: bytes,
+    line_starts: list[int],
     *,
-    offset: int = 0,
+    start: int = 0,
+    stop: int | None = None,
     max_lines: int = 60,
     overlap: int = 2,
+    file_path: str = "",
     language: str | None = None,
     symbol: str | None = None,
-) -> list[Chunk]:
-    """Split lines into overlapping chunks using a sliding window."""
-    chunks: list[Chunk] = []
-    i = 0
-
-    while i < len(lines):
-        end = min(i + max_lines, len(lines))
-        chunk_content = "".join(lines[i:end])
-        chunks.append(
-            Chunk(
-                file_path="",
-                start_line=offset + i + 1,  # 1-indexed
-                end_line=offset + end,
-                content=chunk_content,
-                language=language,
-                symbol=symbol if i == 0 else None,
-            )
+) -> Iterator[Chunk]:
+    """Lazily split lines ``[start, stop)`` into overlapping sliding-window chunks."""
+    num_lines = len(line_starts) - 1
+    stop = num_lines if stop is None else min(stop, num_lines)
+    if start >= stop:
+        return
+
+    # Windows advance by a fixed step; once one reaches ``stop`` the scan
+    # ends, so no window after the first starts in the last ``overlap`` lines.
+    step = max(max_lines - overlap, 1)
+    for i in range(start, max(stop - overlap, start + 1), step):
+        end = min(i + max_lines, stop)
+        yield Chunk(
+            file_path=file_path,
+            start_line=i + 1,  # 1-indexed
+            end_line=end,
+            content=_slice_lines(data, line_starts, i, end),
+            language=language,
+            symbol=symbol if i == start else None,
         )
-        i = end - overlap if end < len(lines) else end
 
-    return chunks
+
+def _is_minified_or_binary(data: bytes) -> bool:
+    """Cheap check on raw bytes for content that should not be chunked."""
+    if b"\0" in data[:_BINARY_SNIFF_BYTES]:
+        return True
+    return len(data) > MAX_AVG_LINE_LENGTH * (data.count(b"\n") + 1)
 
 
-def chunk_file(path: Path, *, max_lines: int = 60, overlap: int = 2) -> list[Chunk]:
-    """Chunk a single file into a list of Chunk objects.
+def chunk_file(
+    path: Path, *, max_lines: int = 60, overlap: int = 2, file_path: str = ""
+) -> Iterator[Chunk]:
+    """Lazily chunk a single file.
 
     Uses tree-sitter for supported languages, falls back to sliding window.
+    Chunks are produced as they are consumed, so callers can stream them
+    onward without holding a whole file's chunks in memory. *file_path* is
+    recorded on every chunk (usually the path relative to the project root).
+    Binary and minified files yield nothing.
     """
     try:
-        text = path.read_text(encoding="utf-8", errors="replace")
+        data = path.read_bytes()
     except OSError:
-        return []
-
-    lines = text.splitlines(keepends=True)
-    if not lines:
-        return []
+        return
+
+    # Universal newlines, as read_text() would give: CRLF and lone CR
+    # endings must not leak "\r" into chunks or collapse a file to one line
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+    if _is_minified_or_binary(data):
+        return
+
+    line_starts = _line_starts(data)
+    num_lines = len(line_starts) - 1
+    if num_lines == 0:
+        return
+
+    lang_info = _language_for(path, data)
+
+    # A file that fits in one window is a single chunk whatever its
+    # structure, so there is nothing to gain from parsing it
+    if num_lines <= max_lines:
+        yield Chunk(
+            file_path=file_path,
+            start_line=1,
+            end_line=num_lines,
+            content=data.decode("utf-8", errors="replace"),
+            language=lang_info[1] if lang_info is not None else None,
+            symbol=None,
+        )
+        return
 
-    # Try tree-sitter first
-    lang_info = EXTENSION_TO_LANGUAGE.get(path.suffix.lower())
-    if lang_info is not None:
+    # Try tree-sitter first, unless the file is too large to parse cheaply
+    if lang_info is not None and num_lines <= MAX_PARSE_LINES:
         module_name, language_name = lang_info
-        ts_chunks = _chunk_with_treesitter(
-            text, lines, language_name, module_name, max_lines, overlap
-        )
-        if ts_chunks is not None:
-            return ts_chunks
+        # Languages without semantic node types (html, css) never need a parse
+        semantic_types = SEMANTIC_NODE_TYPES.get(language_name)
+        if semantic_types is not None:
+            emitted = False
+            for chunk in _chunk_with_treesitter(
+                data, line_starts, language_name, module_name, semantic_types,
+                max_lines, overlap, file_path=file_path,
+            ):
+                emitted = True
+                yield chunk
+            if emitted:
+                return
 
     # Fallback: sliding window
-    return _sliding_window(lines, max_lines=max_lines, overlap=overlap)
+    yield from _sliding_window(
+        data, line_starts, max_lines=max_lines, overlap=overlap, file_path=file_path
+    )
+
+
+def sort_key_for_chunking(path: Path) -> tuple[str, Path]:
+    """Sort key that groups files by tree-sitter language.
+
+    Chunking files of one language back to back keeps that grammar's parse
+    tables hot in CPU cache instead of alternating between grammars.
+    """
+    lang_info = _language_for(path)
+    return (lang_info[1] if lang_info is not None else "", path)
+
+
+def languages_for(paths: Iterable[Path]) -> set[tuple[str, str]]:
+    """Return the ``(module_name, language_name)`` pairs needed to chunk *paths*."""
+    return {info for p in paths if (info := _language_for(p)) is not None}
+
+
+def warm_languages(lang_infos: Iterable[tuple[str, str]]) -> None:
+    """Load tree-sitter languages and queries ahead of chunking.
+
+    Takes ``(module_name, language_name)`` pairs as found in
+    EXTENSION_TO_LANGUAGE. Languages without semantic node types are skipped
+    since chunk_file never parses them. Grammars are loaded concurrently;
+    each is a separate shared library, so the loads mostly overlap.
+    """
+    pending = [
+        (language_name, module_name, semantic_types)
+        for module_name, language_name in set(lang_infos)
+        if (semantic_types := SEMANTIC_NODE_TYPES.get(language_name)) is not None
+        and language_name not in _query_cache
+    ]
+    if len(pending) <= 1:
+        for args in pending:
+            _get_query(*args)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+        list(executor.map(lambda args: _get_query(*args), pending))
+
+
+def uses_process_pool(num_files: int, workers: int | None = None) -> bool:
+    """Return True if chunk_files would chunk *num_files* files on a process pool.
+
+    Languages warmed in the calling process do not reach process workers,
+    so callers can use this to skip warming they would waste.
+    """
+    return (workers or os.cpu_count() or 1) > 1 and num_files >= PROCESS_POOL_MIN_FILES
+
+
+def chunk_files(
+    paths: Iterable[Path],
+    *,
+    max_lines: int = 60,
+    overlap: int = 2,
+    root: Path | None = None,
+    workers: int | None = os.cpu_count(),
+) -> Iterator[tuple[Path, list[Chunk]]]:
+    """Chunk many files concurrently, yielding ``(path, chunks)`` in input order.
+
+    tree-sitter releases the GIL while parsing, but walking query captures
+    and slicing lines does not. Small batches are chunked on a thread pool,
+    with languages and queries loaded up front so workers only ever hit the
+    caches; batches of at least PROCESS_POOL_MIN_FILES files go to a process
+    pool, whose workers warm their own caches, so that Python-side work
+    scales with cores too. If the process pool breaks, the remaining files
+    are chunked on threads. If *root* is given, chunks record their file's
+    path relative to it.
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    prefix_len = root_prefix_len(root) if root is not None else None
+
+    if uses_process_pool(len(paths), workers):
+        # spawn rather than fork: callers may already be running threads.
+        # Each worker loads the grammars it will need before taking files.
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_languages,
+            initargs=(languages_for(paths),),
+        )
+        done = 0
+        try:
+            for item in _chunk_on(executor, paths, workers, max_lines, overlap, prefix_len):
+                yield item
+                done += 1
+            return
+        except BrokenProcessPool:
+            # Spawned workers re-import the main module, which not every
+            # entry point allows (e.g. an unguarded script or frozen app)
+            logger.warning("Process pool unavailable, chunking on threads")
+            paths = paths[done:]
+
+    warm_languages(languages_for(paths))
+    yield from _chunk_on(
+        ThreadPoolExecutor(max_workers=workers), paths, workers, max_lines, overlap, prefix_len
+    )
+
+
+def _chunk_on(
+    executor: Executor,
+    paths: list[Path],
+    workers: int,
+    max_lines: int,
+    overlap: int,
+    prefix_len: int | None,
+) -> Iterator[tuple[Path, list[Chunk]]]:
+    """Chunk *paths* on *executor* for chunk_files, shutting it down when done."""
+    # Only run a few files ahead of the consumer so chunks of the whole
+    # project never pile up in memory while it embeds earlier batches
+    lookahead = 4 * workers
+    pending: deque[tuple[Path, Future[list[Chunk]]]] = deque()
+    with executor:
+        for path in paths:
+            future = executor.submit(_chunk_path, path, max_lines, overlap, prefix_len)
+            pending.append((path, future))
+            if len(pending) >= lookahead:
+                done_path, future = pending.popleft()
+                yield done_path, future.result()
+        while pending:
+            done_path, future = pending.popleft()
+            yield done_path, future.result()
+
+
+def _chunk_path(
+    path: Path, max_lines: int, overlap: int, prefix_len: int | None
+) -> list[Chunk]:
+    """Chunk one file for chunk_files; module-level so process pools can pickle it.
+
+    *prefix_len* is the project root's root_prefix_len, if chunks should
+    record a relative path.
+    """
+    file_path = str(path)[prefix_len:] if prefix_len is not None else ""
+    return list(chunk_file(path, max_lines=max_lines, overlap=overlap, file_path=file_path))
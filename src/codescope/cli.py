@@ -100,8 +100,11 @@ def reindex_file_cmd(file: Path, project: Path) -> None:
     Deletes old chunks for the file, re-chunks, embeds, and upserts.
     If the file was deleted, cleans up its chunks from the index.
     Designed to be called from editor hooks (e.g. Claude Code PostToolUse).
+
+    The work is handed to the project's warm daemon (started on first use)
+    and only runs in-process if the daemon cannot be reached.
     """
-    from .indexer import reindex_file
+    from .daemon import request_reindex
 
     project = project.resolve()
     file = file.resolve()
@@ -112,19 +115,50 @@ def reindex_file_cmd(file: Path, project: Path) -> None:
         console.print("[yellow]Not indexed.[/] Run `codescope index` first.")
         raise SystemExit(1)
 
-    result = reindex_file(config, file)
+    result = request_reindex(config, file)
+    if result is None:
+        from dataclasses import asdict
+
+        from .indexer import reindex_file
+
+        result = asdict(reindex_file(config, file))
 
-    if result.files_deleted:
+    if result["files_deleted"]:
         console.print(f"[green]Cleaned up[/] {file.relative_to(project)}")
-    elif result.chunks_indexed:
+    elif result["chunks_indexed"]:
         console.print(
             f"[green]Re-indexed[/] {file.relative_to(project)} "
-            f"({result.chunks_indexed} chunks)"
+            f"({result['chunks_indexed']} chunks)"
         )
     else:
         console.print(f"[dim]Skipped[/] {file.relative_to(project)}")
 
 
+@main.command()
+@click.option("--project", default=".", type=click.Path(exists=True, path_type=Path),
+              help="Project root (default: current directory).")
+@click.option("--idle-timeout", default=600.0, show_default=True,
+              help="Exit after this many seconds without a request.")
+def daemon(project: Path, idle_timeout: float) -> None:
+    """Serve reindex-file requests from a warm background process.
+
+    Keeps tree-sitter grammars and ChromaDB loaded so hook-driven re-indexing
+    skips interpreter cold start. Started automatically by reindex-file;
+    there is normally no need to run it by hand.
+    """
+    from .daemon import serve
+
+    project = project.resolve()
+    config = CodeScopeConfig(project_root=project)
+    _validate_config(config)
+
+    if not config.db_dir.exists():
+        console.print("[yellow]Not indexed.[/] Run `codescope index` first.")
+        raise SystemExit(1)
+
+    serve(config, idle_timeout=idle_timeout)
+
+
 @main.command()
 @click.argument("query")
 @click.option("-n", "--num-results", default=10, help="Number of results to return.")
@@ -522,3 +556,7 @@ def init_codex(path: Path, user: bool) -> None:
         "  1. Run [bold]codescope index .[/] to index the project\n"
         "  2. Open the project with Codex"
     )
+
+
+if __name__ == "__main__":
+    main()
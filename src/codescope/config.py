@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
+import functools
 import os
+import re
+import stat
 from dataclasses import dataclass, field
 from pathlib import Path
-from pathspec import PathSpec
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .ignore import IgnoreSpec
 
 # Default directory name for the codescope database inside a project
 DEFAULT_DB_DIR = ".codescope"
@@ -31,8 +37,8 @@ DEFAULT_MAX_CHUNK_LINES = 60
 DEFAULT_N_RESULTS = 10
 
 # File extensions to index by default
-DEFAULT_EXTENSIONS: set[str] = {
-    ".py", ".js", ".ts", ".tsx", ".jsx",
+DEFAULT_EXTENSIONS: frozenset[str] = frozenset({
+    ".py", ".pyi", ".js", ".mjs", ".cjs", ".ts", ".mts", ".cts", ".tsx", ".jsx",
     ".go", ".rs", ".java", ".kt", ".c", ".cpp", ".h", ".hpp",
     ".cs", ".rb", ".php", ".swift", ".scala",
     ".dart", ".gd", ".tscn", ".tres", ".gdshader", ".gdshaderinc",
@@ -40,10 +46,10 @@ DEFAULT_EXTENSIONS: set[str] = {
     ".yaml", ".yml", ".toml", ".json",
     ".md", ".mdx", ".txt", ".rst",
     ".html", ".css", ".scss", ".svelte", ".vue",
-}
+})
 
 # Directories to always ignore (safety net — never indexable)
-IGNORE_DIRS: set[str] = {
+IGNORE_DIRS: frozenset[str] = frozenset({
     # Version control
     ".git", ".hg", ".svn",
     # Dependencies
@@ -62,7 +68,7 @@ IGNORE_DIRS: set[str] = {
     ".applord",
     # Environment
     ".env",
-}
+})
 
 # Name of the user-editable ignore file inside .codescope/
 IGNORE_FILE_NAME = ".codescopeignore"
@@ -286,18 +292,42 @@ DEFAULT_IGNORE_CONTENT = """\
 """
 
 
-def load_ignore_spec(project_root: Path) -> PathSpec | None:
-    """Read .codescope/.codescopeignore and return a gitignore-style PathSpec."""
+# Non-blank lines that are not comments. Leading whitespace is kept: as in
+# git, "  # x" is a pattern, not a comment.
+_IGNORE_LINE_RE = re.compile(r"^(?!#)(.*\S.*)$", re.MULTILINE)
+
+
+def load_ignore_spec(project_root: Path) -> IgnoreSpec | None:
+    """Read .codescope/.codescopeignore and return a gitignore-style PathSpec.
+
+    Compiled specs are cached by the file's mtime and size, so long-lived
+    processes that build many configs only recompile after an edit.
+    """
     ignore_path = project_root / DEFAULT_DB_DIR / IGNORE_FILE_NAME
-    if not ignore_path.is_file():
+    try:
+        st = ignore_path.stat()
+    except OSError:
         return None
-    lines = ignore_path.read_text(encoding="utf-8").splitlines()
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return _compile_ignore_file(str(ignore_path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_ignore_file(path: str, mtime_ns: int, size: int) -> IgnoreSpec | None:
+    """Compile an ignore file. *mtime_ns* and *size* only key the cache."""
+    # Only pattern lines go to pathspec; comments and blank lines would each
+    # become an inert Pattern object
+    lines = _IGNORE_LINE_RE.findall(Path(path).read_text(encoding="utf-8"))
     if not lines:
         return None
-    return PathSpec.from_lines("gitignore", lines)
+    # Imported here so commands that never read an ignore file skip pathspec
+    from .ignore import IgnoreSpec
+
+    return IgnoreSpec.from_lines("gitignore", lines)
 
 
-def matches_ignore(rel_path: str, spec: PathSpec | None) -> bool:
+def matches_ignore(rel_path: str, spec: IgnoreSpec | None) -> bool:
     """Return True if *rel_path* is ignored by the gitignore spec."""
     if spec is None:
         return False
@@ -307,7 +337,29 @@ def matches_ignore(rel_path: str, spec: PathSpec | None) -> bool:
     return spec.match_file(norm)
 
 
-@dataclass
+def matches_ignore_dir(rel_dir: str, spec: IgnoreSpec | None) -> bool:
+    """Return True if walkers can skip the directory *rel_dir* entirely.
+
+    That is, the directory matches the spec and no negated pattern could
+    re-include a file beneath it, so every file inside would be ignored.
+    """
+    if spec is None:
+        return False
+    return spec.match_dir(rel_dir.replace("\\", "/"))
+
+
+def root_prefix_len(project_root: Path) -> int:
+    """Length of the project root's path including its trailing separator.
+
+    Slicing ``str(file)`` at this offset gives ``str(file.relative_to(root))``
+    for any file whose path textually starts with the root, without building
+    intermediate Paths. Files collected under CodeScopeConfig.project_root
+    always do, since the config resolves it.
+    """
+    return len(str(project_root).rstrip(os.sep)) + 1
+
+
+@dataclass(slots=True)
 class CodeScopeConfig:
     """Runtime configuration for a codescope session."""
 
@@ -319,11 +371,15 @@ class CodeScopeConfig:
     max_chunk_lines: int = DEFAULT_MAX_CHUNK_LINES
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
     n_results: int = DEFAULT_N_RESULTS
-    extensions: set[str] = field(default_factory=lambda: DEFAULT_EXTENSIONS.copy())
-    ignore_dirs: set[str] = field(default_factory=lambda: IGNORE_DIRS.copy())
-    ignore_spec: PathSpec | None = field(default=None, init=False)
+    # Shared immutable defaults; replace (not mutate) to customise
+    extensions: frozenset[str] = DEFAULT_EXTENSIONS
+    ignore_dirs: frozenset[str] = IGNORE_DIRS
+    ignore_spec: IgnoreSpec | None = field(default=None, init=False)
 
     def __post_init__(self) -> None:
+        # Collected files start with the resolved root, which is what lets
+        # per-file loops slice it off (root_prefix_len) instead of relative_to
+        self.project_root = self.project_root.resolve()
         self.db_dir = self.project_root / DEFAULT_DB_DIR
         self._apply_global_config()
         self.ignore_spec = load_ignore_spec(self.project_root)
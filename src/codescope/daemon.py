@@ -0,0 +1,219 @@
+"""Reindex daemon — keeps a warm process around for editor-hook reindexing.
+
+`codescope reindex-file` runs on every editor save. A fresh interpreter has to
+import ChromaDB and load tree-sitter grammars each time, which dominates the
+cost of re-indexing a single file. The daemon pays that once per project and
+serves reindex requests over a Unix socket at .codescope/daemon.sock.
+
+Protocol: one newline-terminated JSON request per connection,
+``{"file": "/abs/path", "config": "<fingerprint>"}``, answered with the
+IndexResult fields as JSON. The daemon re-reads the project configuration for
+every request; if it no longer matches the client's fingerprint (e.g. the
+client's environment has a different API key) the daemon refuses the
+request and exits, and the client re-indexes in-process.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from .config import CodeScopeConfig
+
+SOCKET_FILENAME = "daemon.sock"
+
+# Held while a daemon checks for, replaces, binds or removes the socket
+LOCK_FILENAME = "daemon.lock"
+
+# Seconds without a request before the daemon shuts itself down
+DEFAULT_IDLE_TIMEOUT = 600.0
+
+# Seconds a client waits for a reply (matches the PostToolUse hook timeout)
+_REQUEST_TIMEOUT = 30.0
+
+# Seconds a client waits for a freshly spawned daemon to bind its socket
+_SPAWN_TIMEOUT = 5.0
+
+
+def socket_path(config: CodeScopeConfig) -> Path:
+    """Return the daemon socket path for a project."""
+    return config.db_dir / SOCKET_FILENAME
+
+
+def config_fingerprint(config: CodeScopeConfig) -> str:
+    """Digest of the settings that change what a reindex writes."""
+    fields = (
+        config.embedding_provider,
+        config.embedding_model,
+        config.openai_api_key,
+        config.max_chunk_lines,
+        config.chunk_overlap,
+    )
+    return hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()
+
+
+def request_reindex(config: CodeScopeConfig, file_path: Path) -> dict[str, int] | None:
+    """Ask the project's daemon to re-index a file, starting it if needed.
+
+    Returns the IndexResult fields, or None if no daemon could be reached
+    (callers should then re-index in-process).
+    """
+    if not hasattr(socket, "AF_UNIX") or sys.platform == "win32":
+        return None
+
+    path = socket_path(config)
+    request = {"file": str(file_path), "config": config_fingerprint(config)}
+    try:
+        return _send(path, request)
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+    except OSError:
+        return None
+
+    _spawn(config)
+    deadline = time.monotonic() + _SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            return _send(path, request)
+        except (FileNotFoundError, ConnectionRefusedError):
+            time.sleep(0.05)
+        except OSError:
+            return None
+    return None
+
+
+def _send(path: Path, request: dict[str, Any]) -> dict[str, int] | None:
+    """Send one request and wait for its reply. Returns None on a daemon error."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(_REQUEST_TIMEOUT)
+        conn.connect(str(path))
+        conn.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        reply = _read_line(conn)
+
+    try:
+        payload = json.loads(reply)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(payload, dict) or "error" in payload:
+        return None
+    return payload
+
+
+def _spawn(config: CodeScopeConfig) -> None:
+    """Start a detached daemon for the project."""
+    subprocess.Popen(
+        [
+            sys.executable, "-m", "codescope.cli", "daemon",
+            "--project", str(config.project_root),
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _read_line(conn: socket.socket) -> bytes:
+    """Read from a connection until a newline or EOF."""
+    buf = bytearray()
+    while b"\n" not in buf:
+        data = conn.recv(65536)
+        if not data:
+            break
+        buf.extend(data)
+    return bytes(buf).split(b"\n", 1)[0]
+
+
+def _is_serving(path: Path) -> bool:
+    """Return True if another daemon is already accepting on the socket."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(str(path))
+        return True
+    except OSError:
+        return False
+
+
+def serve(config: CodeScopeConfig, *, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+    """Serve reindex requests for a project until idle for *idle_timeout* seconds.
+
+    Requests are handled one at a time so hash-registry writes never race.
+    The configuration is rebuilt for every request, so ignore-file, provider
+    and model changes apply immediately; a request whose fingerprint differs
+    from it (settings only the client's environment carries) is refused and
+    the daemon exits so the next hook starts a fresh one. The vector store is
+    still opened per request: `codescope index --full` may drop and recreate
+    the collection from another process.
+    """
+    import fcntl
+
+    path = socket_path(config)
+    lock_path = config.db_dir / LOCK_FILENAME
+    with lock_path.open("w") as lock:
+        # Two hooks firing together may both spawn a daemon; only one binds
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if _is_serving(path):
+            return
+        path.unlink(missing_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen()
+        bound_inode = path.stat().st_ino
+        fcntl.flock(lock, fcntl.LOCK_UN)
+
+        with server:
+            try:
+                _serve_requests(server, config.project_root, idle_timeout)
+            finally:
+                # Still listening, so no other daemon can have replaced the
+                # socket unless it was removed from under us; never unlink
+                # a socket this process did not bind
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    if path.stat().st_ino == bound_inode:
+                        path.unlink()
+                except OSError:
+                    pass
+
+
+def _serve_requests(server: socket.socket, project_root: Path, idle_timeout: float) -> None:
+    """Accept and answer reindex requests until idle or the config goes stale."""
+    # Bound first so clients queue up while the heavy imports run
+    from .chunker import EXTENSION_TO_LANGUAGE, warm_languages
+    from .indexer import reindex_file
+
+    warm_languages(EXTENSION_TO_LANGUAGE.values())
+
+    server.settimeout(idle_timeout)
+    while True:
+        try:
+            conn, _ = server.accept()
+        except TimeoutError:
+            return
+        stale = False
+        with conn:
+            conn.settimeout(_REQUEST_TIMEOUT)
+            try:
+                request = json.loads(_read_line(conn))
+                config = CodeScopeConfig(project_root=project_root)
+                if request.get("config") != config_fingerprint(config):
+                    stale = True
+                    reply: dict[str, Any] = {"error": "configuration changed"}
+                else:
+                    result = reindex_file(config, Path(request["file"]))
+                    reply = asdict(result)
+            except Exception as exc:
+                reply = {"error": str(exc)}
+            try:
+                conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+            except OSError:
+                pass
+        if stale:
+            return
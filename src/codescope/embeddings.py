@@ -2,10 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 from typing import Any
 
+import numpy as np
+
 from .config import CodeScopeConfig
 
+# Embedding requests kept in flight at once against the OpenAI API
+OPENAI_CONCURRENCY = 8
+
+# Retries per request; the client backs off exponentially on rate limits,
+# timeouts and 5xx responses
+OPENAI_MAX_RETRIES = 5
+
 
 def get_chromadb_embedding_function(config: CodeScopeConfig) -> Any | None:
     """Return a ChromaDB embedding function for the configured provider.
@@ -15,39 +26,85 @@ def get_chromadb_embedding_function(config: CodeScopeConfig) -> Any | None:
     - OpenAI provider: returns None (embeddings are computed externally).
     """
     if config.is_local:
-        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
-
-        return DefaultEmbeddingFunction()
+        return _local_embedding_function(config.embedding_model)
     return None
 
 
+@functools.lru_cache(maxsize=None)
+def _local_embedding_function(model_name: str) -> Any:
+    """Build ChromaDB's default embedding function once per model name.
+
+    The function loads its ONNX model and tokenizer on first use, so sharing
+    one instance lets long-lived processes (MCP server, reindex daemon) pay
+    for that only once.
+    """
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+    return DefaultEmbeddingFunction()
+
+
 def embed_texts_openai(
     texts: list[str],
     config: CodeScopeConfig,
     *,
     batch_size: int = 100,
-) -> list[list[float]]:
-    """Generate embeddings via OpenAI API. Requires `pip install codescope[openai]`."""
+) -> np.ndarray:
+    """Generate embeddings via OpenAI API. Requires `pip install codescope[openai]`.
+
+    Returns a ``(len(texts), dim)`` float32 array rather than nested lists of
+    boxed floats. Multiple batches are sent concurrently, at most
+    OPENAI_CONCURRENCY at a time; rows come back in input order either way.
+    """
     try:
-        from openai import OpenAI
+        import openai
     except ImportError:
         raise ImportError(
             "OpenAI provider requires the openai package. "
             "Install with: pip install codescope[openai]"
         ) from None
 
-    client = OpenAI(api_key=config.openai_api_key)
-    all_embeddings: list[list[float]] = []
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    if not batches:
+        return np.empty((0, 0), dtype=np.float32)
+    if len(batches) == 1:
+        # A single request (e.g. a search query) needs no event loop, and the
+        # MCP server may already be running one on this thread
+        client = openai.OpenAI(api_key=config.openai_api_key, max_retries=OPENAI_MAX_RETRIES)
+        response = client.embeddings.create(input=batches[0], model=config.embedding_model)
+        return _as_array(response.data)
+
+    return asyncio.run(_embed_batches_async(batches, config))
+
+
+async def _embed_batches_async(
+    batches: list[list[str]], config: CodeScopeConfig
+) -> np.ndarray:
+    """Embed batches concurrently, returning embeddings in input order."""
+    from openai import AsyncOpenAI
+
+    semaphore = asyncio.Semaphore(OPENAI_CONCURRENCY)
+
+    async with AsyncOpenAI(
+        api_key=config.openai_api_key, max_retries=OPENAI_MAX_RETRIES
+    ) as client:
+
+        async def embed(batch: list[str]) -> np.ndarray:
+            async with semaphore:
+                response = await client.embeddings.create(
+                    input=batch, model=config.embedding_model
+                )
+            return _as_array(response.data)
+
+        results = await asyncio.gather(*(embed(batch) for batch in batches))
+
+    return np.concatenate(results)
 
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i : i + batch_size]
-        response = client.embeddings.create(input=batch, model=config.embedding_model)
-        batch_embeddings = [item.embedding for item in response.data]
-        all_embeddings.extend(batch_embeddings)
 
-    return all_embeddings
+def _as_array(data: list[Any]) -> np.ndarray:
+    """Pack an embeddings response's vectors into a float32 matrix."""
+    return np.asarray([item.embedding for item in data], dtype=np.float32)
 
 
-def embed_query_openai(query: str, config: CodeScopeConfig) -> list[float]:
+def embed_query_openai(query: str, config: CodeScopeConfig) -> np.ndarray:
     """Embed a single query string via OpenAI API."""
     return embed_texts_openai([query], config)[0]
@@ -1,53 +1,94 @@
 """File hash registry — tracks file content hashes for incremental re-indexing.
 
-Stores a flat JSON dictionary at .codescope/file_hashes.json:
+Stores a versioned JSON envelope at .codescope/file_hashes.json. Its
+``entries`` map each relative path to a ``[hash, mtime, size]`` array:
     {
-        "src/auth.ts": {"hash": "a1b2c3...", "mtime": 1707820800.0},
-        "src/index.ts": {"hash": "d4e5f6...", "mtime": 1707820900.0}
+        "version": 2,
+        "entries": {
+            "src/auth.ts": ["q83vEjRWeJA...", 1707820800.0, 5120],
+            "src/index.ts": ["3q2+7wAAAAA...", 1707820900.0, 812]
+        }
     }
+
+Version 1 registries (a bare ``{path: {"hash", "mtime", "size"}}`` mapping)
+are converted on load.
+
+Hashes are base64-encoded XXH3-128 digests. They only detect changes, so a
+fast non-cryptographic hash is enough. The 64-character SHA-256 hex of older
+versions never compares equal, so such a file is simply re-indexed the next
+time its mtime changes.
 """
 
 from __future__ import annotations
 
+import base64
 import hashlib
-import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+
+import orjson
+import xxhash
+
+from .config import root_prefix_len
 
 HASHES_FILENAME = "file_hashes.json"
 
+# On-disk layout written by save(); version 1 had no header
+REGISTRY_VERSION = 2
+
+# (hash, mtime, size) — size is None for entries migrated from registries
+# that predate it. Entries loaded from JSON are lists, which unpack the same.
+_Entry = tuple[str, float, int | None]
+
 
-@dataclass
+@dataclass(slots=True)
 class FileDiff:
     """Result of comparing current files against stored hashes."""
 
     changed: list[Path]  # new or modified files → need re-embedding
-    deleted: list[str]  # removed files (relative paths) → need cleanup from store
+    deleted: set[str]  # removed files (relative paths) → need cleanup from store
 
 
 class FileHashRegistry:
-    """Manages a flat hash dictionary for change detection."""
+    """Manages the per-file hash entries used for change detection."""
 
     def __init__(self, db_dir: Path) -> None:
         self._path = db_dir / HASHES_FILENAME
-        self._hashes: dict[str, dict[str, Any]] = {}
+        self._entries: dict[str, _Entry] = {}
         self._load()
 
     def _load(self) -> None:
         if self._path.exists():
             try:
-                self._hashes = json.loads(self._path.read_text(encoding="utf-8"))
-            except (json.JSONDecodeError, OSError):
-                self._hashes = {}
+                data = self._path.read_bytes()
+                raw = orjson.loads(data)
+            except (orjson.JSONDecodeError, OSError):
+                return
+            if not isinstance(raw, dict):
+                return
+            if raw.get("version") == REGISTRY_VERSION:
+                self._entries = raw.get("entries") or {}
+            else:
+                self._entries = {
+                    rel: (entry.get("hash", ""), entry.get("mtime", 0.0), entry.get("size"))
+                    for rel, entry in raw.items()
+                    if isinstance(entry, dict)
+                }
 
     def save(self) -> None:
-        """Persist the hash registry to disk."""
+        """Persist the hash registry to disk.
+
+        The registry is written to a temporary file and renamed into place,
+        so a crash mid-write never leaves a truncated registry behind.
+        """
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._path.write_text(
-            json.dumps(self._hashes, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
+        payload = {"version": REGISTRY_VERSION, "entries": self._entries}
+        data = orjson.dumps(payload)
+        tmp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self._path)
 
     def diff(self, files: list[Path], project_root: Path) -> FileDiff:
         """Compare current files against stored hashes.
@@ -57,70 +98,111 @@ class FileHashRegistry:
         """
         changed: list[Path] = []
         current_rel_paths: set[str] = set()
+        # New files, and files whose mtime moved but size did not, need
+        # hashing to be sure. Each carries its stat result for reuse.
+        candidates: list[tuple[Path, str | None, os.stat_result | None]] = []
 
+        prefix_len = root_prefix_len(project_root)
         for file in files:
-            rel = str(file.relative_to(project_root))
+            rel = str(file)[prefix_len:]
             current_rel_paths.add(rel)
 
-            # Quick mtime check first — if mtime hasn't changed, skip hash
-            stored = self._hashes.get(rel)
+            # Quick stat check first — only an mtime change with the same
+            # size leaves the content in doubt
+            stored = self._entries.get(rel)
+            stored_hash: str | None = None
+            st: os.stat_result | None = None
             if stored is not None:
+                stored_hash, stored_mtime, stored_size = stored
                 try:
-                    mtime = file.stat().st_mtime
+                    st = file.stat()
                 except OSError:
                     changed.append(file)
                     continue
 
-                if mtime == stored.get("mtime"):
-                    continue  # mtime same → file unchanged
+                # Entries from older registries have no size; trust mtime alone
+                if stored_size is not None and stored_size != st.st_size:
+                    changed.append(file)  # size differs → content changed
+                    continue
+                if st.st_mtime == stored_mtime:
+                    continue  # mtime and size same → file unchanged
 
-            # mtime differs or file is new → compute hash to be sure
-            file_hash = _hash_file(file)
+            candidates.append((file, stored_hash, st))
+
+        file_hashes = _hash_files([file for file, _, _ in candidates])
+        for (file, stored_hash, st), file_hash in zip(candidates, file_hashes, strict=True):
             if file_hash is None:
                 continue  # unreadable file, skip
 
-            if stored is not None and stored.get("hash") == file_hash:
+            if st is not None and stored_hash == file_hash:
                 # Content identical despite mtime change (e.g. git checkout)
                 # Update mtime so next check is fast
-                try:
-                    stored["mtime"] = file.stat().st_mtime
-                except OSError:
-                    pass
+                self._entries[str(file)[prefix_len:]] = (file_hash, st.st_mtime, st.st_size)
                 continue
 
             changed.append(file)
 
         # Detect deleted files
-        stored_paths = set(self._hashes.keys())
-        deleted = sorted(stored_paths - current_rel_paths)
+        deleted = self._entries.keys() - current_rel_paths
 
         return FileDiff(changed=changed, deleted=deleted)
 
     def update(self, file: Path, project_root: Path) -> None:
         """Update the hash entry for a single file."""
-        rel = str(file.relative_to(project_root))
+        rel = str(file)[root_prefix_len(project_root):]
         file_hash = _hash_file(file)
         if file_hash is None:
             return
         try:
-            mtime = file.stat().st_mtime
+            st = file.stat()
         except OSError:
-            mtime = 0.0
-        self._hashes[rel] = {"hash": file_hash, "mtime": mtime}
+            self._entries[rel] = (file_hash, 0.0, None)
+            return
+        self._entries[rel] = (file_hash, st.st_mtime, st.st_size)
+
+    def update_many(self, files: list[Path], project_root: Path) -> None:
+        """Update the hash entries for several files, hashing them in parallel."""
+        prefix_len = root_prefix_len(project_root)
+        for file, file_hash in zip(files, _hash_files(files), strict=True):
+            if file_hash is None:
+                continue
+            rel = str(file)[prefix_len:]
+            try:
+                st = file.stat()
+            except OSError:
+                self._entries[rel] = (file_hash, 0.0, None)
+                continue
+            self._entries[rel] = (file_hash, st.st_mtime, st.st_size)
 
     def remove(self, rel_path: str) -> None:
         """Remove a file entry from the registry."""
-        self._hashes.pop(rel_path, None)
+        self._entries.pop(rel_path, None)
 
     @property
     def tracked_count(self) -> int:
-        return len(self._hashes)
+        return len(self._entries)
+
+
+def _hash_files(paths: list[Path]) -> list[str | None]:
+    """Hash files in input order.
+
+    The hash functions release the GIL, so reads and hashing overlap across
+    threads; one or no file skips the pool.
+    """
+    if len(paths) <= 1:
+        return [_hash_file(path) for path in paths]
+    with ThreadPoolExecutor() as executor:
+        return list(executor.map(_hash_file, paths))
 
 
 def _hash_file(path: Path) -> str | None:
-    """Compute SHA-256 hash of a file's contents."""
+    """Compute a 128-bit hash of a file's contents, base64-encoded.
+
+    The file is streamed through the hash rather than read into memory whole.
+    """
     try:
-        content = path.read_bytes()
+        with path.open("rb", buffering=0) as f:
+            digest = hashlib.file_digest(f, xxhash.xxh3_128).digest()
     except OSError:
         return None
-    return hashlib.sha256(content).hexdigest()
+    return base64.b64encode(digest).decode("ascii").rstrip("=")
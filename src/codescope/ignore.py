@@ -0,0 +1,156 @@
+"""Ignore-file matching — a PathSpec tuned for paths that are not ignored.
+
+Kept apart from config so that pathspec is only imported once an ignore
+file actually has to be compiled.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from pathspec import PathSpec
+
+# Prefix of every gitignore pattern that may match at any directory depth
+_ANY_DIR_PREFIX = "^(?:.+/)?"
+
+# Characters that make a gitignore pattern more than a literal name
+_GLOB_CHARS = frozenset("*?[\\")
+
+
+def _classify_ignore_pattern(source: str) -> tuple[str, str] | None:
+    """Sort an any-depth gitignore pattern into a set-lookup bucket.
+
+    Returns ``("name", name)`` for a bare name such as ``**/node_modules/``,
+    ``("suffix", ".ext")`` for ``**/*.ext``, or None when only the regex
+    can decide.
+    """
+    body = source.removeprefix("**/").removesuffix("/")
+    if not body or "/" in body or body != body.strip():
+        return None
+    if not _GLOB_CHARS.intersection(body):
+        return ("name", body)
+    if body.startswith("*.") and not _GLOB_CHARS.intersection(body[1:]):
+        return ("suffix", body[1:])
+    return None
+
+
+def _covers_contents(regex_source: str) -> bool:
+    """Return True if a pattern matching ``dir/`` also matches all paths under it.
+
+    Compiled gitignore regexes are matched from the start of the path and
+    are only open-ended when they finish on a directory boundary.
+    """
+    return regex_source == "." or regex_source.endswith(("/", "(?:/|$)"))
+
+
+class IgnoreSpec(PathSpec):
+    """PathSpec that rules out non-matching paths before the per-pattern pass.
+
+    PathSpec tries every pattern in turn, so a path that is not ignored (the
+    common case) costs one regex search per pattern. A path can only be
+    ignored if a non-negated pattern matches it. Most such patterns are bare
+    names (``**/dist/``) or extensions (``**/*.map``), which are checked with
+    set lookups on the path's components; the rest share one combined regex.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._names: set[str] = set()
+        self._suffixes: set[str] = set()
+        # Literal leading path of each negated pattern; None once a negation
+        # could re-include paths anywhere in the tree
+        self._reinclude_prefixes: list[str] | None = []
+        # Patterns that, once they match a directory, match everything in it
+        self._dir_regexes: list[re.Pattern[str]] = []
+        any_dir: list[str] = []
+        anchored: list[str] = []
+        for pattern in self.patterns:
+            if getattr(pattern, "regex", None) is None:
+                continue
+            if not pattern.include:
+                if pattern.include is False:
+                    self._add_reinclude(pattern)
+                continue
+            if _covers_contents(pattern.regex.pattern):
+                self._dir_regexes.append(pattern.regex)
+            bucket = _classify_ignore_pattern(getattr(pattern, "pattern", None) or "")
+            if bucket is not None:
+                kind, value = bucket
+                (self._names if kind == "name" else self._suffixes).add(value)
+                continue
+            # Named groups would clash once the patterns are joined
+            src = re.sub(r"\(\?P<\w+>", "(?:", pattern.regex.pattern)
+            if src.startswith(_ANY_DIR_PREFIX):
+                any_dir.append(src.removeprefix(_ANY_DIR_PREFIX))
+            else:
+                anchored.append(src)
+
+        # Sharing the any-depth prefix means each directory boundary is tried
+        # once for all patterns rather than once per pattern
+        sources = anchored
+        if any_dir:
+            sources = [_ANY_DIR_PREFIX + "(?:" + "|".join(any_dir) + ")", *anchored]
+        self._prefilter = (
+            re.compile("|".join(f"(?:{src})" for src in sources)) if sources else None
+        )
+
+    def _add_reinclude(self, pattern: Any) -> None:
+        """Record where a negated pattern can re-include paths."""
+        if self._reinclude_prefixes is None:
+            return
+        source = (getattr(pattern, "pattern", None) or "").removeprefix("!").lstrip("/")
+        literal: list[str] = []
+        for part in source.split("/"):
+            if not part or _GLOB_CHARS.intersection(part):
+                break
+            literal.append(part)
+        if pattern.regex.pattern.startswith(_ANY_DIR_PREFIX) or not literal:
+            self._reinclude_prefixes = None
+        else:
+            self._reinclude_prefixes.append("/".join(literal))
+
+    def match_dir(self, rel_dir: str) -> bool:
+        """Return True if *rel_dir* and everything beneath it is ignored.
+
+        A directory that matches a pattern (``foo/``, ``foo/**``) can still
+        hold files that a later negation re-includes (``!foo/keep.py``), so
+        it only counts as ignored when no negated pattern can reach inside.
+        """
+        # The trailing slash lets directory-only patterns ("build/") match.
+        # Patterns such as ``foo/*`` match ``foo/sub/`` but not the files in
+        # it, so only patterns that cover a directory's contents count.
+        dir_path = rel_dir + "/"
+        if not any(regex.match(dir_path) for regex in self._dir_regexes):
+            return False
+        prefixes = self._reinclude_prefixes
+        if prefixes is None:
+            return False
+        for prefix in prefixes:
+            if (
+                prefix == rel_dir
+                or prefix.startswith(rel_dir + "/")
+                or rel_dir.startswith(prefix + "/")
+            ):
+                return False
+        return True
+
+    def _may_match(self, file: str) -> bool:
+        """Return False only if no non-negated pattern can match *file*."""
+        names = self._names
+        suffixes = self._suffixes
+        for part in file.split("/"):
+            if part in names:
+                return True
+            if suffixes:
+                dot = part.find(".")
+                while dot != -1:
+                    if part[dot:] in suffixes:
+                        return True
+                    dot = part.find(".", dot + 1)
+        return self._prefilter is not None and self._prefilter.search(file) is not None
+
+    def match_file(self, file: Any, *args: Any, **kwargs: Any) -> bool:
+        if isinstance(file, str) and not self._may_match(file):
+            return False
+        return super().match_file(file, *args, **kwargs)
@@ -1,26 +1,61 @@
 """Core indexing logic — walks the project, chunks files, embeds, and stores.
 
 Supports incremental re-indexing: only changed/new files are re-embedded,
-deleted files are cleaned up from the store. Uses a flat SHA-256 hash
-dictionary persisted at .codescope/file_hashes.json.
+deleted files are cleaned up from the store. Uses the content-hash
+registry persisted at .codescope/file_hashes.json.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import batched
 from pathlib import Path
+from typing import Any
 
+import numpy as np
 from rich.console import Console
-from rich.progress import BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TextColumn
-
-from .chunker import Chunk, chunk_file
-from .config import CodeScopeConfig, matches_ignore
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    SpinnerColumn,
+    TaskID,
+    TextColumn,
+)
+
+from .chunker import (
+    Chunk,
+    chunk_file,
+    chunk_files,
+    languages_for,
+    sniff_language,
+    sort_key_for_chunking,
+    uses_process_pool,
+    warm_languages,
+)
+from .config import CodeScopeConfig, matches_ignore, matches_ignore_dir, root_prefix_len
 from .embeddings import embed_texts_openai, get_chromadb_embedding_function
-from .file_hashes import FileHashRegistry
+from .file_hashes import FileDiff, FileHashRegistry
 from .store import VectorStore
 
 console = Console()
 
+# Chunks embedded and upserted together while streaming an index run
+EMBED_BATCH_SIZE = 256
+
+# Batches whose OpenAI embedding requests may be outstanding at once
+OPENAI_BATCHES_IN_FLIGHT = 4
+
+# Files chunked between progress bar updates
+PROGRESS_STEP = 64
+
+# Vectors of recently embedded texts kept for identical chunks in later batches
+EMBEDDING_CACHE_SIZE = 4096
+
 
 @dataclass
 class IndexResult:
@@ -32,22 +67,56 @@ class IndexResult:
     files_unchanged: int
 
 
+def _has_indexable_type(path: Path, config: CodeScopeConfig) -> bool:
+    """Return True for files with an indexed extension or recognised scripts.
+
+    Extensionless files are indexed when tree-sitter can parse them: build
+    files like Rakefile, or scripts with a python/node/ruby shebang.
+    """
+    if path.suffix in config.extensions:
+        return True
+    return not path.suffix and sniff_language(path) is not None
+
+
 def collect_files(config: CodeScopeConfig) -> list[Path]:
-    """Walk the project root and collect indexable files."""
+    """Walk the project root and collect indexable files.
+
+    Ignored directories are pruned from the walk, so nothing beneath them is
+    visited or matched against the ignore rules. Files are screened by name
+    before any Path is built or stat() call made.
+    """
+    root = config.project_root
+    ignore_dirs = config.ignore_dirs
+    extensions = config.extensions
+    spec = config.ignore_spec
+    root_len = root_prefix_len(root)
     files: list[Path] = []
-    for path in config.project_root.rglob("*"):
-        # Hardcoded directory blocklist (safety net)
-        if any(part in config.ignore_dirs for part in path.parts):
-            continue
-        if not path.is_file():
-            continue
-        if path.suffix not in config.extensions:
-            continue
-        # User-defined .codescopeignore (gitignore syntax)
-        rel = str(path.relative_to(config.project_root))
-        if matches_ignore(rel, config.ignore_spec):
-            continue
-        files.append(path)
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = dirpath[root_len:]
+        prefix = rel_dir + os.sep if rel_dir else ""
+        # Hardcoded directory blocklist (safety net), then .codescopeignore
+        dirnames[:] = [
+            d
+            for d in dirnames
+            if d not in ignore_dirs and not matches_ignore_dir(prefix + d, spec)
+        ]
+        for name in filenames:
+            if name in ignore_dirs:
+                continue
+            # Extensionless files may still be scripts; sniffed below
+            suffix = os.path.splitext(name)[1]
+            if suffix and suffix not in extensions:
+                continue
+            # User-defined .codescopeignore (gitignore syntax), checked before
+            # anything touches the file
+            if matches_ignore(prefix + name, spec):
+                continue
+            path = Path(dirpath, name)
+            if not path.is_file():
+                continue
+            if not suffix and sniff_language(path) is None:
+                continue
+            files.append(path)
     return sorted(files)
 
 
@@ -83,19 +152,21 @@ def reindex_file(config: CodeScopeConfig, file_path: Path) -> IndexResult:
         registry.save()
         return IndexResult(chunks_indexed=0, files_changed=0, files_deleted=1, files_unchanged=0)
 
-    # Skip files that don't match our indexing criteria
-    if file_path.suffix not in config.extensions:
-        registry.save()
-        return IndexResult(chunks_indexed=0, files_changed=0, files_deleted=0, files_unchanged=1)
-
-    if matches_ignore(rel, config.ignore_spec):
+    # Skip files that don't match our indexing criteria; the ignore rules go
+    # first so ignored files are never opened for sniffing
+    if matches_ignore(rel, config.ignore_spec) or not _has_indexable_type(file_path, config):
         registry.save()
         return IndexResult(chunks_indexed=0, files_changed=0, files_deleted=0, files_unchanged=1)
 
     # Chunk and re-embed
-    chunks = chunk_file(file_path, max_lines=config.max_chunk_lines, overlap=config.chunk_overlap)
-    for c in chunks:
-        c.file_path = rel
+    chunks = list(
+        chunk_file(
+            file_path,
+            max_lines=config.max_chunk_lines,
+            overlap=config.chunk_overlap,
+            file_path=rel,
+        )
+    )
 
     if chunks:
         _embed_and_store(store, chunks, config)
@@ -121,15 +192,54 @@ def index_project(config: CodeScopeConfig, *, full: bool = False) -> IndexResult
     Returns:
         IndexResult with stats about what happened.
     """
-    store = _create_store(config)
-    registry = FileHashRegistry(config.db_dir)
     files = collect_files(config)
+    registry = FileHashRegistry(config.db_dir)
+    diff = None if full else registry.diff(files, config.project_root)
+    to_chunk = files if diff is None else diff.changed
+
+    # Load the grammars these files need while ChromaDB starts up, so the
+    # first file of each language does not pay for it during chunking. Runs
+    # that chunk on a process pool warm in the workers instead.
+    if not to_chunk or uses_process_pool(len(to_chunk)):
+        store = _create_store(config)
+    else:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            warming = executor.submit(warm_languages, languages_for(to_chunk))
+            store = _create_store(config)
+            warming.result()
 
-    if full:
+    if diff is None:
         store.clear()
         return _full_index(store, registry, files, config)
 
-    return _incremental_index(store, registry, files, config)
+    return _incremental_index(store, registry, files, diff, config)
+
+
+def _stream_chunks(
+    files: list[Path],
+    config: CodeScopeConfig,
+    progress: Progress,
+    task: TaskID,
+) -> Iterator[Chunk]:
+    """Chunk files in parallel, yielding chunks tagged with their relative path.
+
+    Files are counted on the progress task once their chunks have been
+    handed on, PROGRESS_STEP at a time.
+    """
+    done = 0
+    for done, (_, chunks) in enumerate(
+        chunk_files(
+            sorted(files, key=sort_key_for_chunking),
+            max_lines=config.max_chunk_lines,
+            overlap=config.chunk_overlap,
+            root=config.project_root,
+        ),
+        start=1,
+    ):
+        yield from chunks
+        if done % PROGRESS_STEP == 0:
+            progress.update(task, completed=done)
+    progress.update(task, completed=done)
 
 
 def _full_index(
@@ -143,30 +253,24 @@ def _full_index(
         registry.save()
         return IndexResult(chunks_indexed=0, files_changed=0, files_deleted=0, files_unchanged=0)
 
-    all_chunks: list[Chunk] = []
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         MofNCompleteColumn(),
         transient=True,
+        refresh_per_second=4,
     ) as progress:
-        task = progress.add_task("Chunking files...", total=len(files))
-        for f in files:
-            rel = str(f.relative_to(config.project_root))
-            chunks = chunk_file(f, max_lines=config.max_chunk_lines, overlap=config.chunk_overlap)
-            for c in chunks:
-                c.file_path = rel
-            all_chunks.extend(chunks)
-            registry.update(f, config.project_root)
-            progress.advance(task)
-
-    if all_chunks:
-        _embed_and_store(store, all_chunks, config)
+        task = progress.add_task("Indexing files...", total=len(files))
+        chunks_indexed = _embed_and_store(
+            store, _stream_chunks(files, config, progress, task), config
+        )
+
+    registry.update_many(files, config.project_root)
 
     registry.save()
     return IndexResult(
-        chunks_indexed=len(all_chunks),
+        chunks_indexed=chunks_indexed,
         files_changed=len(files),
         files_deleted=0,
         files_unchanged=0,
@@ -177,18 +281,21 @@ def _incremental_index(
     store: VectorStore,
     registry: FileHashRegistry,
     files: list[Path],
+    diff: FileDiff,
     config: CodeScopeConfig,
 ) -> IndexResult:
-    """Only re-index changed files, clean up deleted ones."""
-    diff = registry.diff(files, config.project_root)
-
+    """Only re-index the changed files in *diff*, clean up deleted ones."""
     files_deleted = len(diff.deleted)
     files_changed = len(diff.changed)
     files_unchanged = len(files) - files_changed
 
-    # Clean up deleted files from the store
+    # Purge chunks of deleted and changed files in bulk; changed files are
+    # re-added below
+    prefix_len = root_prefix_len(config.project_root)
+    stale = list(diff.deleted)
+    stale.extend(str(f)[prefix_len:] for f in diff.changed)
+    store.delete_by_files(stale)
     for rel_path in diff.deleted:
-        store.delete_by_file(rel_path)
         registry.remove(rel_path)
 
     if not diff.changed:
@@ -200,33 +307,25 @@ def _incremental_index(
             files_unchanged=files_unchanged,
         )
 
-    # Chunk only the changed files
-    all_chunks: list[Chunk] = []
+    # Chunk and embed only the changed files
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         MofNCompleteColumn(),
         transient=True,
+        refresh_per_second=4,
     ) as progress:
-        task = progress.add_task("Chunking changed files...", total=files_changed)
-        for f in diff.changed:
-            rel = str(f.relative_to(config.project_root))
-            # Remove old chunks for this file before re-adding
-            store.delete_by_file(rel)
-            chunks = chunk_file(f, max_lines=config.max_chunk_lines, overlap=config.chunk_overlap)
-            for c in chunks:
-                c.file_path = rel
-            all_chunks.extend(chunks)
-            registry.update(f, config.project_root)
-            progress.advance(task)
-
-    if all_chunks:
-        _embed_and_store(store, all_chunks, config)
+        task = progress.add_task("Indexing changed files...", total=files_changed)
+        chunks_indexed = _embed_and_store(
+            store, _stream_chunks(diff.changed, config, progress, task), config
+        )
+
+    registry.update_many(diff.changed, config.project_root)
 
     registry.save()
     return IndexResult(
-        chunks_indexed=len(all_chunks),
+        chunks_indexed=chunks_indexed,
         files_changed=files_changed,
         files_deleted=files_deleted,
         files_unchanged=files_unchanged,
@@ -235,21 +334,102 @@ def _incremental_index(
 
 def _embed_and_store(
     store: VectorStore,
-    chunks: list[Chunk],
+    chunks: Iterable[Chunk],
     config: CodeScopeConfig,
-) -> None:
-    """Embed chunks and upsert into the vector store."""
+) -> int:
+    """Embed chunks and upsert them into the vector store.
+
+    *chunks* is consumed lazily, EMBED_BATCH_SIZE at a time, so only a few
+    batches are resident at once. Returns the number of chunks stored.
+    """
+    # Shared across batches — one file's chunks can straddle a batch boundary
+    seen = _SeenIds()
+    cache: dict[bytes, Any] = {}
+    batches = (
+        _prepare_batch(batch, seen, cache) for batch in batched(chunks, EMBED_BATCH_SIZE)
+    )
+    total = 0
+
+    if config.is_local:
+        # ChromaDB's built-in model
+        for batch in batches:
+            embedded = store.embed_documents(batch.unique_texts) if batch.unique_texts else []
+            _upsert_batch(store, batch, _scatter(batch, embedded, cache))
+            total += len(batch.ids)
+        return total
+
+    # OpenAI: requests are network-bound, so later batches are embedded on
+    # worker threads while earlier ones are upserted, in order, here.
+    pending: deque[tuple[_PreparedBatch, Future[np.ndarray]]] = deque()
+    with ThreadPoolExecutor(max_workers=OPENAI_BATCHES_IN_FLIGHT) as executor:
+        for batch in batches:
+            pending.append(
+                (batch, executor.submit(embed_texts_openai, batch.unique_texts, config))
+            )
+            if len(pending) >= OPENAI_BATCHES_IN_FLIGHT:
+                done, future = pending.popleft()
+                _upsert_batch(store, done, _scatter(done, future.result(), cache))
+                total += len(done.ids)
+        while pending:
+            done, future = pending.popleft()
+            _upsert_batch(store, done, _scatter(done, future.result(), cache))
+            total += len(done.ids)
+    return total
+
+
+@dataclass(slots=True)
+class _PreparedBatch:
+    """A batch of chunks ready to embed: unique texts plus upsert payload."""
+
+    ids: list[str]
+    texts: list[str]
+    metadatas: list[dict[str, Any]]
+    unique_texts: list[str]
+    unique_hashes: list[bytes]  # content hash of each unique text
+    reused: list[Any]  # cached vectors for texts embedded by earlier batches
+    slots: list[int]  # index into unique_texts + reused for each chunk
+
+
+@dataclass(slots=True)
+class _SeenIds:
+    """Raw chunk ID counts for the file whose chunks may continue into the next batch."""
+
+    file_path: str | None = None
+    counts: Counter[str] = field(default_factory=Counter)
+
+
+def _prepare_batch(
+    chunks: Sequence[Chunk], seen: _SeenIds, cache: dict[bytes, Any]
+) -> _PreparedBatch:
+    """Build IDs, metadata and the deduplicated texts for one batch."""
     texts = [c.content for c in chunks]
 
     # Ensure IDs are unique — minified files can produce multiple chunks
     # on the same line range, yielding duplicate IDs.
     raw_ids = [c.id for c in chunks]
-    seen: dict[str, int] = {}
-    ids: list[str] = []
-    for raw_id in raw_ids:
-        count = seen.get(raw_id, 0)
-        ids.append(f"{raw_id}#{count}" if count > 0 else raw_id)
-        seen[raw_id] = count + 1
+    counts = Counter(raw_ids)
+    if len(counts) == len(raw_ids) and seen.counts.keys().isdisjoint(counts):
+        ids = raw_ids  # common case: nothing to suffix
+    else:
+        # Repeats get "#1", "#2", … continuing the count from earlier batches
+        repeats: Counter[str] = Counter()
+        ids = []
+        for raw_id in raw_ids:
+            count = seen.counts[raw_id] + repeats[raw_id]
+            repeats[raw_id] += 1
+            ids.append(f"{raw_id}#{count}" if count > 0 else raw_id)
+
+    # Finished files cannot produce their IDs again; only the last file's
+    # chunks may continue into the next batch, so remember just those rather
+    # than one entry per chunk of the whole project.
+    last_file = chunks[-1].file_path
+    tail = len(chunks) - 1
+    while tail > 0 and chunks[tail - 1].file_path == last_file:
+        tail -= 1
+    if seen.file_path != last_file:
+        seen.file_path = last_file
+        seen.counts.clear()
+    seen.counts.update(raw_ids[tail:])
 
     metadatas = [
         {
@@ -262,25 +442,50 @@ def _embed_and_store(
         for c in chunks
     ]
 
-    if config.is_local:
-        # ChromaDB handles embedding internally
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            transient=True,
-        ) as progress:
-            progress.add_task("Embedding & storing (local)...", total=None)
-            store.upsert_documents(ids=ids, documents=texts, metadatas=metadatas)
-    else:
-        # OpenAI: compute embeddings externally
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            transient=True,
-        ) as progress:
-            progress.add_task("Generating embeddings (OpenAI)...", total=None)
-            embeddings = embed_texts_openai(texts, config)
-
-        store.upsert_embeddings(
-            ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas
-        )
+    # Identical chunks (license headers, boilerplate, re-export stubs) are
+    # embedded once and the vector is shared by every chunk with that text.
+    # Texts already embedded by a recent batch reuse its cached vector.
+    hashes = [c.content_hash for c in chunks]
+    fresh: dict[bytes, str] = {}  # content hash → text to embed
+    reused: dict[bytes, Any] = {}  # content hash → cached vector
+    for content_hash, c in zip(hashes, chunks, strict=True):
+        if content_hash in fresh or content_hash in reused:
+            continue
+        vector = cache.get(content_hash)
+        if vector is not None:
+            reused[content_hash] = vector
+        else:
+            fresh[content_hash] = c.content
+    slot_by_hash = {h: i for i, h in enumerate([*fresh, *reused])}
+    slots = [slot_by_hash[h] for h in hashes]
+
+    return _PreparedBatch(
+        ids, texts, metadatas, list(fresh.values()), list(fresh), list(reused.values()), slots
+    )
+
+
+def _scatter(batch: _PreparedBatch, embedded: Sequence[Any], cache: dict[bytes, Any]) -> Any:
+    """Fan the batch's unique and reused vectors out to one per chunk.
+
+    Newly embedded vectors are remembered in *cache*, oldest evicted first.
+    """
+    for content_hash, vector in zip(batch.unique_hashes, embedded, strict=True):
+        if len(cache) >= EMBEDDING_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        # Copy rows so a cached vector does not pin its whole batch matrix
+        cache[content_hash] = np.array(vector, dtype=np.float32)
+    if not batch.reused and isinstance(embedded, np.ndarray):
+        # One float32 matrix, so fanning rows back out is a single take
+        return embedded[batch.slots]
+    vectors = [*embedded, *batch.reused]
+    return [vectors[s] for s in batch.slots]
+
+
+def _upsert_batch(store: VectorStore, batch: _PreparedBatch, embeddings: Sequence[Any]) -> None:
+    """Upsert one prepared batch with an embedding per chunk."""
+    store.upsert_embeddings(
+        ids=batch.ids,
+        embeddings=embeddings,
+        documents=batch.texts,
+        metadatas=batch.metadatas,
+    )
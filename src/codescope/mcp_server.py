@@ -3,14 +3,29 @@
 from __future__ import annotations
 
 import json
+import os
+from collections import OrderedDict
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from mcp.server.fastmcp import FastMCP
 
-from .config import CodeScopeConfig
+from .config import CodeScopeConfig, root_prefix_len
+from .file_hashes import HASHES_FILENAME
 from .indexer import collect_files
 from .search import search as do_search
 
+if TYPE_CHECKING:
+    from .store import VectorStore
+
+# Open stores by (db dir, provider, model), with the index version they saw,
+# least recently used first. Each holds a loaded HNSW index, so at most
+# STORE_CACHE_SIZE stay open.
+STORE_CACHE_SIZE = 8
+_stores: OrderedDict[tuple[str, str, str], tuple[tuple[int, int] | None, VectorStore]] = (
+    OrderedDict()
+)
+
 
 def _validate_openai(config: CodeScopeConfig) -> str | None:
     """Return an error string if OpenAI provider is used without an API key."""
@@ -19,6 +34,51 @@ def _validate_openai(config: CodeScopeConfig) -> str | None:
     return None
 
 
+def _index_version(db_dir: Path) -> tuple[int, int] | None:
+    """Identify the last write to an index.
+
+    Every index run and reindex-file call saves the hash registry (via an
+    atomic rename) after writing to the store, so its mtime and inode change
+    whenever the store does.
+    """
+    try:
+        st = (db_dir / HASHES_FILENAME).stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_ino
+
+
+def _get_store(config: CodeScopeConfig) -> VectorStore:
+    """Return an open VectorStore for the project, reusing it across calls.
+
+    Opening a PersistentClient loads the HNSW index, which dominates the
+    cost of a tool call. A cached store is reopened once the index has been
+    written by another process (the reindex hook or `codescope index`), so
+    results never go stale.
+    """
+    from .embeddings import get_chromadb_embedding_function
+    from .store import VectorStore
+
+    key = (str(config.db_dir), config.embedding_provider, config.embedding_model)
+    version = _index_version(config.db_dir)
+    cached = _stores.pop(key, None)
+    if cached is not None:
+        if cached[0] == version:
+            _stores[key] = cached
+            return cached[1]
+        # Clients on one path share Chroma's state; close the stale one
+        # first so the new store really reloads the index
+        cached[1].close()
+
+    ef = get_chromadb_embedding_function(config)
+    store = VectorStore(config.db_dir, embedding_function=ef)
+    _stores[key] = (version, store)
+    if len(_stores) > STORE_CACHE_SIZE:
+        _, (_, evicted) = _stores.popitem(last=False)
+        evicted.close()
+    return store
+
+
 def main() -> None:
     """Entry point for the codescope MCP server."""
 
@@ -49,7 +109,7 @@ def main() -> None:
         if not config.db_dir.exists():
             return f"Error: Project not indexed. Run `codescope index {path}` first."
 
-        results = do_search(query, config)
+        results = do_search(query, config, store=_get_store(config))
         if not results:
             return "No results found."
 
@@ -81,8 +141,6 @@ def main() -> None:
     @mcp.resource("codescope://status")
     def resource_status() -> str:
         """Current indexing status — project path, provider, model, chunk count."""
-        from .store import VectorStore
-
         path = Path(".").resolve()
         config = CodeScopeConfig(project_root=path)
 
@@ -92,7 +150,7 @@ def main() -> None:
                 indent=2,
             )
 
-        store = VectorStore(config.db_dir)
+        store = _get_store(config)
         return json.dumps(
             {
                 "indexed": True,
@@ -118,7 +176,8 @@ def main() -> None:
 
         registry = FileHashRegistry(config.db_dir)
         files = collect_files(config)
-        file_list = [str(f.relative_to(config.project_root)) for f in files]
+        prefix_len = root_prefix_len(config.project_root)
+        file_list = [str(f)[prefix_len:] for f in files]
 
         return json.dumps(
             {
@@ -141,30 +200,40 @@ def main() -> None:
         path = Path(".").resolve()
         config = CodeScopeConfig(project_root=path)
         files = collect_files(config)
-        rel_paths = sorted(str(f.relative_to(config.project_root)) for f in files)
 
-        # Build nested dict representing the directory tree
+        # Build nested dict representing the directory tree. Directory nodes
+        # are remembered by relative path, so each file costs one lookup.
         tree: dict = {}
-        for rp in rel_paths:
-            parts = rp.replace("\\", "/").split("/")
-            node = tree
-            for part in parts:
-                node = node.setdefault(part, {})
-
-        # Render to an indented string
+        dir_nodes: dict[str, dict] = {"": tree}
+        prefix_len = root_prefix_len(config.project_root)
+        for f in files:
+            parent, _, name = str(f)[prefix_len:].rpartition(os.sep)
+            node = dir_nodes.get(parent)
+            if node is None:
+                node = tree
+                for part in parent.split(os.sep):
+                    node = node.setdefault(part, {})
+                dir_nodes[parent] = node
+            node[name] = {}
+
+        # Render to an indented string, depth-first with an explicit stack
         lines: list[str] = [f"{path.name}/"]
 
-        def _render(node: dict, prefix: str = "") -> None:
-            entries = sorted(node.keys(), key=lambda k: (not node[k], k.lower()))
-            for i, name in enumerate(entries):
-                is_last = i == len(entries) - 1
-                connector = "+-- " if is_last else "|-- "
-                lines.append(f"{prefix}{connector}{name}")
-                if node[name]:  # has children — it's a directory
-                    extension = "    " if is_last else "|   "
-                    _render(node[name], prefix + extension)
-
-        _render(tree)
+        def _entries(node: dict, prefix: str) -> list[tuple[str, dict, str, bool]]:
+            """Children of *node* in display order, reversed for popping."""
+            names = sorted(node, key=lambda k: (not node[k], k.lower()))
+            last = len(names) - 1
+            return [(name, node[name], prefix, i == last) for i, name in enumerate(names)][::-1]
+
+        stack = _entries(tree, "")
+        while stack:
+            name, children, prefix, is_last = stack.pop()
+            connector = "+-- " if is_last else "|-- "
+            lines.append(f"{prefix}{connector}{name}")
+            if children:  # has children — it's a directory
+                extension = "    " if is_last else "|   "
+                stack.extend(_entries(children, prefix + extension))
+
         return "\n".join(lines)
 
     @mcp.resource("codescope://config")
@@ -10,7 +10,7 @@ from .embeddings import embed_query_openai, get_chromadb_embedding_function
 from .store import VectorStore
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """A single search result."""
 
@@ -29,10 +29,17 @@ class SearchResult:
         return f"{loc}{sym}  [similarity: {score}]"
 
 
-def search(query: str, config: CodeScopeConfig) -> list[SearchResult]:
-    """Run a semantic search query against the indexed codebase."""
-    ef = get_chromadb_embedding_function(config)
-    store = VectorStore(config.db_dir, embedding_function=ef)
+def search(
+    query: str, config: CodeScopeConfig, *, store: VectorStore | None = None
+) -> list[SearchResult]:
+    """Run a semantic search query against the indexed codebase.
+
+    Long-running callers may pass an already open *store*; it must have been
+    opened with the embedding function for *config*.
+    """
+    if store is None:
+        ef = get_chromadb_embedding_function(config)
+        store = VectorStore(config.db_dir, embedding_function=ef)
 
     if config.is_local:
         raw: dict[str, Any] = store.query_text(query, n_results=config.n_results)
@@ -44,25 +51,26 @@ def search(query: str, config: CodeScopeConfig) -> list[SearchResult]:
 
 
 def _parse_results(raw: dict[str, Any]) -> list[SearchResult]:
-    """Parse raw ChromaDB query results into SearchResult objects."""
-    results: list[SearchResult] = []
+    """Parse raw ChromaDB query results into SearchResult objects.
+
+    VectorStore queries always include documents, metadatas and distances,
+    and the indexer stores every metadata field on every chunk, so fields are
+    read directly rather than with defaults.
+    """
     if not raw["ids"] or not raw["ids"][0]:
-        return results
-
-    for i, chunk_id in enumerate(raw["ids"][0]):
-        meta = raw["metadatas"][0][i] if raw["metadatas"] else {}
-        doc = raw["documents"][0][i] if raw["documents"] else ""
-        dist = raw["distances"][0][i] if raw["distances"] else 0.0
-
-        results.append(
-            SearchResult(
-                file_path=meta.get("file_path", chunk_id),
-                start_line=int(meta.get("start_line", 0)),
-                end_line=int(meta.get("end_line", 0)),
-                content=doc,
-                distance=dist,
-                symbol=meta.get("symbol", ""),
-            )
+        return []
+
+    metadatas = raw["metadatas"][0]
+    documents = raw["documents"][0]
+    distances = raw["distances"][0]
+    return [
+        SearchResult(
+            meta["file_path"],
+            meta["start_line"],
+            meta["end_line"],
+            doc,
+            dist,
+            meta["symbol"],
         )
-
-    return results
+        for meta, doc, dist in zip(metadatas, documents, distances, strict=True)
+    ]
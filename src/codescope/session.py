@@ -7,13 +7,17 @@ between snapshot and current state drives incremental re-indexing.
 
 from __future__ import annotations
 
+import base64
 import hashlib
-import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from .config import CodeScopeConfig
+import orjson
+
+from .config import CodeScopeConfig, root_prefix_len
 from .indexer import collect_files
 
 SESSION_FILENAME = "session_snapshot.json"
@@ -36,18 +40,16 @@ def take_snapshot(config: CodeScopeConfig) -> int:
     files = collect_files(config)
     snapshot: dict[str, dict[str, Any]] = {}
 
-    for f in files:
-        rel = str(f.relative_to(config.project_root))
-        file_hash = _hash_file(f)
-        if file_hash is not None:
-            snapshot[rel] = {"hash": file_hash}
+    prefix_len = root_prefix_len(config.project_root)
+    for f, entry in zip(files, _file_entries(files), strict=True):
+        if entry is not None:
+            snapshot[str(f)[prefix_len:]] = entry
 
     snapshot_path = config.db_dir / SESSION_FILENAME
     config.db_dir.mkdir(parents=True, exist_ok=True)
-    snapshot_path.write_text(
-        json.dumps(snapshot, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    tmp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(orjson.dumps(snapshot))
+    os.replace(tmp_path, snapshot_path)
 
     return len(snapshot)
 
@@ -62,19 +64,32 @@ def compute_diff(config: CodeScopeConfig) -> SessionDiff | None:
         return None
 
     try:
-        snapshot: dict[str, dict[str, Any]] = json.loads(
-            snapshot_path.read_text(encoding="utf-8")
-        )
-    except (json.JSONDecodeError, OSError):
+        snapshot: dict[str, dict[str, Any]] = orjson.loads(snapshot_path.read_bytes())
+    except (orjson.JSONDecodeError, OSError):
         return None
 
     files = collect_files(config)
     current_hashes: dict[str, str] = {}
+    to_hash: list[tuple[str, Path]] = []
+    prefix_len = root_prefix_len(config.project_root)
     for f in files:
-        rel = str(f.relative_to(config.project_root))
-        h = _hash_file(f)
-        if h is not None:
-            current_hashes[rel] = h
+        rel = str(f)[prefix_len:]
+        # Unchanged mtime and size → reuse the snapshot hash without reading
+        entry = snapshot.get(rel)
+        if entry is not None and "mtime" in entry:
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            if entry["mtime"] == st.st_mtime_ns and entry.get("size") == st.st_size:
+                current_hashes[rel] = entry["hash"]
+                continue
+        to_hash.append((rel, f))
+
+    hashed = _file_entries([f for _, f in to_hash])
+    for (rel, _), entry in zip(to_hash, hashed, strict=True):
+        if entry is not None:
+            current_hashes[rel] = entry["hash"]
 
     modified: list[str] = []
     created: list[str] = []
@@ -103,10 +118,27 @@ def clear_snapshot(config: CodeScopeConfig) -> None:
         snapshot_path.unlink()
 
 
-def _hash_file(path: Path) -> str | None:
-    """Compute SHA-256 hash of a file's contents."""
+def _file_entries(files: list[Path]) -> list[dict[str, Any] | None]:
+    """Build snapshot entries for files on a thread pool, in input order.
+
+    Reads and SHA-256 both release the GIL, so small-file syscalls and
+    hashing overlap across threads.
+    """
+    with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2) as executor:
+        return list(executor.map(_file_entry, files))
+
+
+def _file_entry(path: Path) -> dict[str, Any] | None:
+    """Return a file's SHA-256 hash (base64), mtime (ns) and size.
+
+    The file is stat()ed before it is read, so a write racing the hash
+    leaves a stale mtime and the file is re-hashed next time.
+    """
     try:
-        content = path.read_bytes()
+        with path.open("rb", buffering=0) as f:
+            st = os.fstat(f.fileno())
+            digest = hashlib.file_digest(f, "sha256").digest()
     except OSError:
         return None
-    return hashlib.sha256(content).hexdigest()
+    file_hash = base64.b64encode(digest).decode("ascii").rstrip("=")
+    return {"hash": file_hash, "mtime": st.st_mtime_ns, "size": st.st_size}
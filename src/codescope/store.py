@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any
 
@@ -9,12 +10,27 @@ import chromadb
 
 COLLECTION_NAME = "codescope"
 
+# Records per collection.upsert call. Chroma slows down on very large
+# upserts; slabs of ~100-250 records keep each write small and steady.
+UPSERT_BATCH_SIZE = 128
+
+# File paths per bulk delete. Each path in the $in clause becomes a bound
+# SQLite variable, and older SQLite builds allow only 999 per statement.
+DELETE_BATCH_SIZE = 500
+
+# Applied when the collection is created. hnsw:sync_threshold stays at
+# Chroma's default: records past the last persist are replayed on every
+# reopen, which the daemon and MCP server do often, and raising it made
+# full runs no faster either.
+_COLLECTION_METADATA = {"hnsw:space": "cosine"}
+
 
 class VectorStore:
     """Thin wrapper around ChromaDB for storing and querying code embeddings.
 
     Supports two modes:
-    - Local: ChromaDB handles embedding internally (pass documents, not vectors).
+    - Local: ChromaDB's built-in embedding function embeds documents, either
+      inside upsert/query or up front via embed_documents().
     - OpenAI: Embeddings are computed externally and passed as vectors.
     """
 
@@ -24,10 +40,11 @@ class VectorStore:
         # are visible to long-running processes like the MCP server.
         chromadb.api.client.SharedSystemClient.clear_system_cache()
         self._client = chromadb.PersistentClient(path=str(db_path))
+        self._embedding_function = embedding_function
 
         kwargs: dict[str, Any] = {
             "name": COLLECTION_NAME,
-            "metadata": {"hnsw:space": "cosine"},
+            "metadata": _COLLECTION_METADATA,
         }
         if embedding_function is not None:
             kwargs["embedding_function"] = embedding_function
@@ -46,7 +63,7 @@ class VectorStore:
         documents: list[str],
         metadatas: list[dict[str, Any]],
         *,
-        batch_size: int = 5000,
+        batch_size: int = UPSERT_BATCH_SIZE,
     ) -> None:
         """Upsert with ChromaDB handling embedding (local provider)."""
         for start in range(0, len(ids), batch_size):
@@ -57,6 +74,12 @@ class VectorStore:
                 metadatas=metadatas[start:end],
             )
 
+    def embed_documents(self, documents: list[str]) -> list[Any]:
+        """Embed documents with the collection's embedding function (local provider)."""
+        if self._embedding_function is None:
+            raise ValueError("VectorStore has no embedding function")
+        return list(self._embedding_function(documents))
+
     def query_text(self, text: str, n_results: int = 10) -> dict[str, Any]:
         """Query using text — ChromaDB embeds the query (local provider)."""
         return self._collection.query(
@@ -70,11 +93,11 @@ class VectorStore:
     def upsert_embeddings(
         self,
         ids: list[str],
-        embeddings: list[list[float]],
+        embeddings: Sequence[Any],
         documents: list[str],
         metadatas: list[dict[str, Any]],
         *,
-        batch_size: int = 5000,
+        batch_size: int = UPSERT_BATCH_SIZE,
     ) -> None:
         """Upsert with pre-computed embeddings (OpenAI provider)."""
         for start in range(0, len(ids), batch_size):
@@ -86,7 +109,7 @@ class VectorStore:
                 metadatas=metadatas[start:end],
             )
 
-    def query_embedding(self, embedding: list[float], n_results: int = 10) -> dict[str, Any]:
+    def query_embedding(self, embedding: Sequence[float], n_results: int = 10) -> dict[str, Any]:
         """Query using a pre-computed embedding vector (OpenAI provider)."""
         return self._collection.query(
             query_embeddings=[embedding],
@@ -100,10 +123,22 @@ class VectorStore:
         """Delete all chunks belonging to a specific file."""
         self._collection.delete(where={"file_path": file_path})
 
+    def delete_by_files(
+        self, file_paths: Sequence[str], *, batch_size: int = DELETE_BATCH_SIZE
+    ) -> None:
+        """Delete all chunks belonging to any of the given files, in bulk calls."""
+        for start in range(0, len(file_paths), batch_size):
+            batch = list(file_paths[start:start + batch_size])
+            self._collection.delete(where={"file_path": {"$in": batch}})
+
+    def close(self) -> None:
+        """Release this store's hold on the Chroma client for its directory."""
+        self._client.close()
+
     def clear(self) -> None:
         """Delete all data from the collection."""
         self._client.delete_collection(COLLECTION_NAME)
         self._collection = self._client.get_or_create_collection(
             name=COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"},
+            metadata=_COLLECTION_METADATA,
         )
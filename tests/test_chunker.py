@@ -0,0 +1,75 @@
+"""Symbol naming and process-pool fallback in the chunker."""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from codescope import chunker
+
+
+class _BreakingPool(ThreadPoolExecutor):
+    """Runs the first few submissions, then breaks like a dead process pool."""
+
+    def __init__(self, *args: Any, healthy: int, **kwargs: Any) -> None:
+        super().__init__(max_workers=2)
+        self.healthy = healthy
+
+    def submit(self, fn: Any, /, *args: Any, **kwargs: Any) -> Future[Any]:
+        if self.healthy == 0:
+            raise BrokenProcessPool("worker died")
+        self.healthy -= 1
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.mark.parametrize("healthy", [0, 10])
+def test_broken_process_pool_falls_back_to_threads(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, healthy: int
+) -> None:
+    paths = []
+    for i in range(chunker.PROCESS_POOL_MIN_FILES):
+        path = tmp_path / f"m{i}.py"
+        path.write_text(f"def f{i}():\n    return {i}\n")
+        paths.append(path)
+    monkeypatch.setattr(
+        chunker,
+        "ProcessPoolExecutor",
+        lambda *args, **kwargs: _BreakingPool(healthy=healthy),
+    )
+
+    results = list(chunker.chunk_files(paths, root=tmp_path, workers=2))
+
+    assert [path for path, _ in results] == paths
+    assert [chunks[0].file_path for _, chunks in results] == [p.name for p in paths]
+
+
+@pytest.mark.parametrize("suffix", [".js", ".ts"])
+def test_export_statements_are_named_after_what_they_export(
+    tmp_path: Path, suffix: str
+) -> None:
+    path = tmp_path / f"mod{suffix}"
+    path.write_text(
+        "export function bar() {\n"
+        "  return 1;\n"
+        "}\n"
+        "\n"
+        "export class Baz {\n"
+        "  m() {}\n"
+        "}\n"
+        "\n"
+        "const foo = 1;\n"
+        "export default foo;\n"
+    )
+
+    symbols = {
+        chunk.start_line: chunk.symbol
+        for chunk in chunker.chunk_file(path, max_lines=3, overlap=0)
+    }
+
+    assert symbols[1] == "bar"
+    assert symbols[5] == "Baz"
+    assert symbols[10] == "foo"
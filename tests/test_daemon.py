@@ -0,0 +1,71 @@
+"""Reindex requests to the project daemon and the in-process fallback."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from codescope import chunker, daemon, indexer
+from codescope.config import CodeScopeConfig
+from codescope.indexer import IndexResult
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="daemon needs Unix sockets")
+
+
+@pytest.fixture
+def config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> CodeScopeConfig:
+    monkeypatch.setattr(chunker, "warm_languages", lambda lang_infos: None)
+    monkeypatch.setattr(daemon, "_spawn", lambda config: None)
+    monkeypatch.setattr(daemon, "_SPAWN_TIMEOUT", 0.2)
+    config = CodeScopeConfig(project_root=tmp_path)
+    config.db_dir.mkdir()
+    return config
+
+
+def _start(config: CodeScopeConfig) -> threading.Thread:
+    thread = threading.Thread(target=daemon.serve, args=(config,), kwargs={"idle_timeout": 5.0})
+    thread.start()
+    deadline = time.monotonic() + 5.0
+    while not daemon._is_serving(daemon.socket_path(config)):
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.01)
+    return thread
+
+
+def test_request_is_served_by_daemon(
+    config: CodeScopeConfig, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    requested: list[Path] = []
+
+    def fake_reindex(config: CodeScopeConfig, file_path: Path) -> IndexResult:
+        requested.append(file_path)
+        return IndexResult(chunks_indexed=3, files_changed=1, files_deleted=0, files_unchanged=0)
+
+    monkeypatch.setattr(indexer, "reindex_file", fake_reindex)
+    thread = _start(config)
+    try:
+        target = config.project_root / "a.py"
+        result = daemon.request_reindex(config, target)
+        assert result == {
+            "chunks_indexed": 3, "files_changed": 1, "files_deleted": 0, "files_unchanged": 0,
+        }
+        assert requested == [target]
+
+        # A client with different settings is refused, and the daemon exits
+        # so the next request starts one with the current configuration
+        assert daemon.request_reindex(replace(config, max_chunk_lines=7), target) is None
+        thread.join(timeout=5.0)
+        assert not thread.is_alive()
+        assert requested == [target]
+        assert not daemon.socket_path(config).exists()
+    finally:
+        thread.join(timeout=10.0)
+
+
+def test_request_without_daemon_falls_back(config: CodeScopeConfig) -> None:
+    assert daemon.request_reindex(config, config.project_root / "a.py") is None
@@ -0,0 +1,56 @@
+"""Loading and migrating the file hash registry."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+from codescope.file_hashes import HASHES_FILENAME, REGISTRY_VERSION, FileHashRegistry
+
+
+def test_v1_registry_is_migrated(tmp_path: Path) -> None:
+    db_dir = tmp_path / ".codescope"
+    db_dir.mkdir()
+    same = tmp_path / "same.py"
+    same.write_text("x = 1\n")
+    touched = tmp_path / "touched.py"
+    touched.write_text("y = 2\n")
+
+    def v1_entry(path: Path, mtime: float) -> dict[str, object]:
+        return {
+            "hash": hashlib.sha256(path.read_bytes()).hexdigest(),
+            "mtime": mtime,
+            "size": path.stat().st_size,
+        }
+
+    (db_dir / HASHES_FILENAME).write_text(
+        json.dumps(
+            {
+                "same.py": v1_entry(same, same.stat().st_mtime),
+                "touched.py": v1_entry(touched, 1.0),
+                "gone.py": {"hash": "0" * 64, "mtime": 1.0, "size": 3},
+            }
+        )
+    )
+
+    registry = FileHashRegistry(db_dir)
+    files = [same, touched]
+    diff = registry.diff(files, tmp_path)
+    # Matching stat needs no hash; a moved mtime rehashes, and the old
+    # SHA-256 never matches the new digest
+    assert diff.changed == [touched]
+    assert diff.deleted == {"gone.py"}
+
+    registry.update_many(diff.changed, tmp_path)
+    for rel in diff.deleted:
+        registry.remove(rel)
+    registry.save()
+
+    saved = json.loads((db_dir / HASHES_FILENAME).read_text())
+    assert saved["version"] == REGISTRY_VERSION
+    assert sorted(saved["entries"]) == ["same.py", "touched.py"]
+
+    reloaded = FileHashRegistry(db_dir).diff(files, tmp_path)
+    assert reloaded.changed == []
+    assert reloaded.deleted == set()
@@ -0,0 +1,85 @@
+"""IgnoreSpec must agree with plain PathSpec, and directory pruning with both."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from pathspec import PathSpec
+
+from codescope.config import DEFAULT_DB_DIR, IGNORE_FILE_NAME, CodeScopeConfig
+from codescope.ignore import IgnoreSpec
+from codescope.indexer import collect_files
+
+FILES = [
+    "keep.py",
+    "foo/keep.py",
+    "foo/drop.py",
+    "foo/sub/keep.py",
+    "foo/sub/x.py",
+    "foo.py/inner.py",
+    "a/b1/c/x.py",
+    "a/b2/y.py",
+    "bld/z.py",
+    "src/bld/w.py",
+    "src/app.min.js",
+    "x/y/z/deep.py",
+]
+
+SPECS = [
+    ["foo/**", "!foo/keep.py"],
+    ["foo/", "!foo/keep.py"],
+    ["foo", "!keep.py"],
+    ["foo/**", "!foo/sub/"],
+    ["foo/**/", "!foo/sub/keep.py"],
+    ["/a/**", "!/a/b*/c/x.py"],
+    ["*/", "!a/b1/c"],
+    ["*", "!*.py", "!*/"],
+    ["foo/*"],
+    ["*/sub/"],
+    ["bld/"],
+    ["**/bld"],
+    ["x/**/deep.py"],
+    ["x/y"],
+    ["foo.py"],
+    ["*.min.js", "**/node_modules/"],
+    ["**"],
+]
+
+
+@pytest.mark.parametrize("lines", SPECS, ids=" ".join)
+def test_match_file_agrees_with_pathspec(lines: list[str]) -> None:
+    plain = PathSpec.from_lines("gitignore", lines)
+    tuned = IgnoreSpec.from_lines("gitignore", lines)
+    for rel in FILES:
+        assert tuned.match_file(rel) == plain.match_file(rel), rel
+
+
+@pytest.mark.parametrize("lines", SPECS, ids=" ".join)
+def test_collect_files_prunes_only_fully_ignored_dirs(tmp_path: Path, lines: list[str]) -> None:
+    for rel in FILES:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n")
+    ignore_file = tmp_path / DEFAULT_DB_DIR / IGNORE_FILE_NAME
+    ignore_file.parent.mkdir()
+    ignore_file.write_text("\n".join(lines) + "\n")
+
+    config = CodeScopeConfig(project_root=tmp_path)
+    collected = sorted(str(f.relative_to(tmp_path)) for f in collect_files(config))
+
+    plain = PathSpec.from_lines("gitignore", lines)
+    expected = sorted(rel for rel in FILES if not plain.match_file(rel))
+    assert collected == expected
+
+
+def test_negated_file_under_globbed_dir_is_collected(tmp_path: Path) -> None:
+    (tmp_path / "foo").mkdir()
+    (tmp_path / "foo" / "keep.py").write_text("x = 1\n")
+    (tmp_path / "foo" / "drop.py").write_text("x = 1\n")
+    ignore_file = tmp_path / DEFAULT_DB_DIR / IGNORE_FILE_NAME
+    ignore_file.parent.mkdir()
+    ignore_file.write_text("foo/**\n!foo/keep.py\n")
+
+    config = CodeScopeConfig(project_root=tmp_path)
+    assert [f.relative_to(tmp_path) for f in collect_files(config)] == [Path("foo/keep.py")]
@@ -0,0 +1,54 @@
+"""Chunk ID deduplication across embedding batches."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from codescope import indexer
+from codescope.chunker import Chunk
+
+
+class _RecordingStore:
+    def __init__(self) -> None:
+        self.ids: list[str] = []
+
+    def embed_documents(self, documents: list[str]) -> list[Any]:
+        return [[float(len(doc))] for doc in documents]
+
+    def upsert_embeddings(self, *, ids: list[str], **_: Any) -> None:
+        self.ids.extend(ids)
+
+
+def _store_ids(chunks: list[Chunk]) -> list[str]:
+    store = _RecordingStore()
+    config = SimpleNamespace(is_local=True)
+    indexer._embed_and_store(store, iter(chunks), config)  # type: ignore[arg-type]
+    return store.ids
+
+
+def test_duplicate_ids_stay_unique_across_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    batch = indexer.EMBED_BATCH_SIZE
+    # One file's chunks straddle two batch boundaries, every one sharing the
+    # same line range, followed by a second file that reuses that range
+    chunks = [
+        Chunk(file_path="a.py", start_line=1, end_line=3, content=f"a{i}")
+        for i in range(2 * batch + 10)
+    ]
+    chunks += [
+        Chunk(file_path="b.py", start_line=1, end_line=3, content=f"b{i}")
+        for i in range(3)
+    ]
+
+    ids = _store_ids(chunks)
+
+    assert len(ids) == len(chunks)
+    assert len(set(ids)) == len(ids)
+    assert ids[0] == "a.py:1-3"
+    assert ids[-3] == "b.py:1-3"
+
+    # The same chunks in a single batch get the same IDs
+    monkeypatch.setattr(indexer, "EMBED_BATCH_SIZE", len(chunks))
+    assert _store_ids(chunks) == ids
@@ -0,0 +1,49 @@
+"""Relative paths must not depend on how the project root was spelled."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from codescope.chunker import chunk_files
+from codescope.config import CodeScopeConfig
+from codescope.file_hashes import FileHashRegistry
+from codescope.indexer import collect_files
+from codescope.session import compute_diff, take_snapshot
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    (tmp_path / "foo").mkdir()
+    (tmp_path / "foo" / "drop.py").write_text("def f():\n    return 1\n")
+    (tmp_path / "main.py").write_text("x = 1\n")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("root", [".", "./foo/..", "foo/.."])
+def test_unresolved_root_gives_relative_paths(project: Path, root: str) -> None:
+    config = CodeScopeConfig(project_root=Path(root))
+    assert config.project_root == project.resolve()
+
+    files = collect_files(config)
+    chunked = [
+        chunk.file_path
+        for _, chunks in chunk_files(files, root=config.project_root, workers=1)
+        for chunk in chunks
+    ]
+    assert sorted(chunked) == ["foo/drop.py", "main.py"]
+
+    registry = FileHashRegistry(config.db_dir)
+    assert registry.diff(files, config.project_root).changed == files
+    registry.update_many(files, config.project_root)
+    assert registry.diff(files, config.project_root).changed == []
+
+    assert take_snapshot(config) == 2
+    (project / "foo" / "drop.py").write_text("def f():\n    return 2\n")
+    diff = compute_diff(config)
+    assert diff is not None
+    assert diff.modified == ["foo/drop.py"]
+    assert diff.created == []
+    assert diff.deleted == []